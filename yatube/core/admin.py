@@ -0,0 +1,22 @@
+from django.contrib import admin
+
+from .models import Task
+
+
+class TaskAdmin(admin.ModelAdmin):
+    """Настройки отображения модели Task в интерфейсе админа"""
+    list_display = (
+        'pk',
+        'name',
+        'queue',
+        'status',
+        'attempts',
+        'run_at',
+        'created',
+    )
+    list_filter = ('status', 'queue')
+    search_fields = ('name', 'key')
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(Task, TaskAdmin)
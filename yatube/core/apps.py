@@ -1,5 +1,19 @@
 from django.apps import AppConfig
+from django.conf import settings
+
+METRICS_MIDDLEWARE = 'core.metrics.MetricsMiddleware'
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from .db.routers import track_replica_load
+        from .db.sqlite import configure_connection
+        connection_created.connect(configure_connection)
+        connection_created.connect(track_replica_load)
+        if METRICS_MIDDLEWARE in settings.MIDDLEWARE:
+            from .metrics import time_templates
+            time_templates()
@@ -0,0 +1,14 @@
+from django.utils.functional import SimpleLazyObject
+from posts import follow_cache
+
+
+def follows(request):
+    """
+    Добавляет множество id авторов, на которых подписан пользователь.
+    Кэш читается, только если шаблон обращается к переменной.
+    """
+    return {
+        'followed_author_ids': SimpleLazyObject(
+            lambda: follow_cache.followed_ids(request.user)
+        ),
+    }
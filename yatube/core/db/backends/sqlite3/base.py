@@ -0,0 +1,25 @@
+"""
+Бэкенд SQLite с пулом соединений core.db.pool.
+
+Параметры пула берутся из ключа POOL настроек базы:
+MAX_SIZE, TIMEOUT и HEALTH_CHECK_INTERVAL.
+"""
+from core.db.pool import get_pool
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        self.pool = get_pool(
+            (self.alias, self.settings_dict['NAME']),
+            lambda: super(DatabaseWrapper, self).get_new_connection(
+                conn_params
+            ),
+            self.settings_dict.get('POOL'),
+        )
+        return self.pool.acquire()
+
+    def _close(self):
+        # Соединение не закрывается, а возвращается в пул
+        if self.connection is not None:
+            self.pool.release(self.connection)
@@ -0,0 +1,75 @@
+"""
+Независимые запросы одной страницы — параллельно.
+
+gather(*funcs) выполняет функции одновременно и возвращает их результаты
+по порядку: первую — в потоке запроса, остальные — в общем пуле потоков
+PARALLEL_QUERY_WORKERS, поэтому страница ждёт самый долгий запрос,
+а не сумму всех. У каждого потока пула своё соединение с базой;
+закрепление за основной базой (pin_to_primary) переносится в поток
+вместе с функцией. Поток пула пишет замеры core.metrics в свой Sample,
+который поток запроса добавляет к своему после получения результата.
+
+Другие соединения не видят незафиксированных данных, поэтому внутри
+транзакции (atomic, TestCase) и при PARALLEL_QUERY_WORKERS = 0 функции
+выполняются по очереди в потоке запроса.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+from .. import metrics
+from .routers import is_pinned, pin_to_primary
+
+
+@lru_cache(maxsize=None)
+def _get_executor():
+    return ThreadPoolExecutor(
+        max_workers=settings.PARALLEL_QUERY_WORKERS,
+        thread_name_prefix='parallel-query',
+    )
+
+
+def _in_transaction():
+    return any(connection.in_atomic_block for connection in connections.all())
+
+
+def _call(func, pinned, sample):
+    close_old_connections()
+    try:
+        with ExitStack() as stack:
+            if pinned:
+                stack.enter_context(pin_to_primary())
+            if sample is not None:
+                stack.enter_context(metrics.collect_into(sample))
+            return func(), sample
+    finally:
+        close_old_connections()
+
+
+def gather(*funcs):
+    """Выполнить функции без аргументов одновременно, вернуть их результаты"""
+    if (
+        len(funcs) < 2
+        or not settings.PARALLEL_QUERY_WORKERS
+        or _in_transaction()
+    ):
+        return [func() for func in funcs]
+    executor = _get_executor()
+    sample = metrics.current_sample()
+    futures = [
+        executor.submit(
+            _call, func, is_pinned(),
+            None if sample is None else metrics.Sample(),
+        )
+        for func in funcs[1:]
+    ]
+    results = [funcs[0]()]
+    for future in futures:
+        result, thread_sample = future.result()
+        if thread_sample is not None:
+            sample.merge(thread_sample)
+        results.append(result)
+    return results
@@ -0,0 +1,160 @@
+"""
+Ограниченный пул соединений с базой для процесса.
+
+Django держит по соединению на поток и закрывает его в конце запроса
+(или по истечении CONN_MAX_AGE). Бэкенд core.db.backends.sqlite3
+вместо открытия и закрытия берёт соединение из пула и возвращает его
+обратно, поэтому стоимость установки соединения платится один раз
+на каждое из не более чем MAX_SIZE соединений процесса.
+
+Соединение, которое пролежало в пуле дольше HEALTH_CHECK_INTERVAL
+секунд, перед выдачей проверяется запросом SELECT 1.
+"""
+import threading
+import time
+from collections import deque
+
+from django.db.utils import OperationalError
+
+DEFAULTS = {
+    'MAX_SIZE': 5,
+    'TIMEOUT': 10,
+    'HEALTH_CHECK_INTERVAL': 30,
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolExhausted(OperationalError):
+    """Все соединения пула заняты дольше TIMEOUT секунд"""
+
+
+class ConnectionPool:
+    def __init__(self, connect, max_size=DEFAULTS['MAX_SIZE'],
+                 timeout=DEFAULTS['TIMEOUT'],
+                 health_check_interval=DEFAULTS['HEALTH_CHECK_INTERVAL']):
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._idle = deque()
+        self._size = 0
+        self._condition = threading.Condition()
+        self._stats = {
+            'created': 0,
+            'reused': 0,
+            'released': 0,
+            'discarded': 0,
+            'health_checks': 0,
+            'waits': 0,
+            'timeouts': 0,
+        }
+
+    def _is_healthy(self, raw, idle_since):
+        if time.monotonic() - idle_since < self.health_check_interval:
+            return True
+        self._stats['health_checks'] += 1
+        try:
+            raw.execute('SELECT 1').fetchone()
+        except Exception:
+            return False
+        return True
+
+    def _discard(self, raw):
+        self._stats['discarded'] += 1
+        self._size -= 1
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def acquire(self):
+        """Выдать соединение из пула, создав новое, если есть место"""
+        deadline = time.monotonic() + self.timeout
+        with self._condition:
+            while True:
+                while self._idle:
+                    raw, idle_since = self._idle.pop()
+                    if self._is_healthy(raw, idle_since):
+                        self._stats['reused'] += 1
+                        return raw
+                    self._discard(raw)
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolExhausted(
+                        f'Все {self.max_size} соединений пула заняты'
+                    )
+                self._stats['waits'] += 1
+                self._condition.wait(remaining)
+        try:
+            raw = self.connect()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._stats['created'] += 1
+        return raw
+
+    def release(self, raw, broken=False):
+        """Вернуть соединение в пул; сломанное закрывается"""
+        with self._condition:
+            if not broken:
+                try:
+                    if raw.in_transaction:
+                        raw.rollback()
+                except Exception:
+                    broken = True
+            if broken:
+                self._discard(raw)
+            else:
+                self._stats['released'] += 1
+                self._idle.append((raw, time.monotonic()))
+            self._condition.notify()
+
+    def close(self):
+        """Закрыть все свободные соединения"""
+        with self._condition:
+            while self._idle:
+                raw, idle_since = self._idle.pop()
+                self._discard(raw)
+
+    def stats(self):
+        with self._condition:
+            return {
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                **self._stats,
+            }
+
+
+def get_pool(key, connect, options=None):
+    """Пул процесса для ключа (обычно алиас и имя базы)"""
+    with _pools_lock:
+        if key not in _pools:
+            settings = {**DEFAULTS, **(options or {})}
+            _pools[key] = ConnectionPool(
+                connect,
+                max_size=settings['MAX_SIZE'],
+                timeout=settings['TIMEOUT'],
+                health_check_interval=settings['HEALTH_CHECK_INTERVAL'],
+            )
+        return _pools[key]
+
+
+def pool_stats():
+    """Статистика всех пулов этого процесса (воркера gunicorn)"""
+    with _pools_lock:
+        pools = dict(_pools)
+    return {
+        ':'.join(map(str, key)): pool.stats()
+        for key, pool in pools.items()
+    }
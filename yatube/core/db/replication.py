@@ -0,0 +1,25 @@
+"""
+Копирование основной SQLite-базы в реплики для локальной проверки
+ReplicaRouter. Копия снимается через backup API SQLite, поэтому
+основную базу не нужно останавливать.
+"""
+import sqlite3
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def sync_replicas(aliases=None):
+    """Скопировать default в реплики, вернуть список обновлённых"""
+    aliases = list(aliases or settings.DATABASE_REPLICAS)
+    primary = connections[DEFAULT_DB_ALIAS]
+    primary.ensure_connection()
+    for alias in aliases:
+        # Открытое соединение реплики держит старый снимок файла
+        connections[alias].close()
+        target = sqlite3.connect(connections[alias].settings_dict['NAME'])
+        try:
+            primary.connection.backup(target)
+        finally:
+            target.close()
+    return aliases
@@ -0,0 +1,146 @@
+"""
+Чтение ленты с реплик базы.
+
+ReplicaRouter отправляет чтение моделей из REPLICA_APP_LABELS на одну
+из баз DATABASE_REPLICAS: по кругу (round_robin) или на ту, где сейчас
+меньше всего незавершённых запросов (least_loaded). Запись, миграции
+и чтение остальных моделей (сессии, пользователи) идут в default.
+
+Реплика может отставать, поэтому запросы, которые меняют данные,
+и все запросы того же клиента в течение REPLICA_PIN_SECONDS после
+записи читают из default: PrimaryPinMiddleware ставит cookie
+и закрепляет поток запроса за основной базой. View-функции, которые
+пишут и на GET (подписка), помечаются декоратором writes_on_get.
+"""
+import itertools
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+REPLICA_APP_LABELS = ('posts',)
+PIN_COOKIE = 'primary_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+_local = threading.local()
+_lock = threading.Lock()
+_counter = itertools.count()
+_in_flight = {}
+
+
+def is_pinned():
+    return getattr(_local, 'pinned', False)
+
+
+@contextmanager
+def pin_to_primary():
+    """Читать внутри блока только из основной базы"""
+    previous = is_pinned()
+    _local.pinned = True
+    try:
+        yield
+    finally:
+        _local.pinned = previous
+
+
+def _track_query(alias):
+    def wrapper(execute, sql, params, many, context):
+        with _lock:
+            _in_flight[alias] = _in_flight.get(alias, 0) + 1
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            with _lock:
+                _in_flight[alias] -= 1
+    return wrapper
+
+
+def track_replica_load(sender, connection, **kwargs):
+    """Обработчик connection_created: считать запросы к репликам"""
+    # Сигнал приходит при каждом переподключении той же обёртки базы
+    if connection.alias not in settings.DATABASE_REPLICAS or getattr(
+        connection, '_replica_tracked', False
+    ):
+        return
+    connection._replica_tracked = True
+    connection.execute_wrappers.append(_track_query(connection.alias))
+
+
+def choose_replica():
+    """Реплика для очередного чтения или None, если реплик нет"""
+    replicas = settings.DATABASE_REPLICAS
+    if not replicas:
+        return None
+    start = next(_counter) % len(replicas)
+    ordered = replicas[start:] + replicas[:start]
+    if settings.REPLICA_STRATEGY == 'least_loaded':
+        with _lock:
+            return min(ordered, key=lambda alias: _in_flight.get(alias, 0))
+    return ordered[0]
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if (
+            model._meta.app_label not in REPLICA_APP_LABELS
+            # Исторические модели миграций читают ещё не скопированную схему
+            or model.__module__ == '__fake__'
+            or is_pinned()
+        ):
+            return DEFAULT_DB_ALIAS
+        return choose_replica() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики получают схему вместе с данными от основной базы
+        return db not in settings.DATABASE_REPLICAS
+
+
+def set_pin_cookie(response):
+    """Закрепить клиента за основной базой на REPLICA_PIN_SECONDS"""
+    if settings.DATABASE_REPLICAS:
+        response.set_cookie(
+            PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+            httponly=True, samesite='Lax',
+        )
+
+
+def writes_on_get(view):
+    """
+    View-функция пишет при любом методе: читать в ней из основной базы
+    и закрепить клиента за ней, как после POST.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with pin_to_primary():
+            response = view(request, *args, **kwargs)
+        set_pin_cookie(response)
+        return response
+    return wrapper
+
+
+class PrimaryPinMiddleware:
+    """Закрепить за основной базой записи и чтение сразу после них"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        writes = request.method not in SAFE_METHODS
+        if not writes and PIN_COOKIE not in request.COOKIES:
+            return self.get_response(request)
+        with pin_to_primary():
+            response = self.get_response(request)
+        if writes:
+            set_pin_cookie(response)
+        return response
@@ -0,0 +1,94 @@
+"""
+Настройка SQLite для работы под несколькими воркерами gunicorn.
+
+configure_connection выполняет SQLITE_PRAGMAS для каждого нового
+соединения: WAL позволяет читателям не ждать писателя, а busy_timeout
+заставляет писателя подождать блокировку вместо немедленной ошибки
+database is locked.
+
+serialized_write пропускает изменяющие запросы процесса по одному
+и повторяет view-функцию с экспоненциальной задержкой, если база всё же
+занята писателем из другого процесса. Каждая попытка выполняется
+в transaction.atomic(), поэтому повтор не оставляет половины записи.
+GET-запросы обычно только читают и проходят без очереди; view-функции,
+которые пишут при любом методе, помечаются serialized_write(
+all_methods=True).
+
+Повтор view-функции заново сохранил бы загруженные файлы, и файлы
+неудачной попытки остались бы в хранилище. Поэтому view-функции
+с загрузкой файлов сохраняют их один раз через save_files, а повторяют
+только запись в базу через serialized.
+"""
+import random
+import threading
+import time
+from functools import partial, wraps
+
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.db.utils import OperationalError
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+_write_lock = threading.Lock()
+
+
+def configure_connection(sender, connection, **kwargs):
+    """Обработчик connection_created: прагмы из SQLITE_PRAGMAS"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def is_locked(error):
+    message = str(error)
+    return 'database is locked' in message or 'database is busy' in message
+
+
+def serialized(func, *args, **kwargs):
+    """
+    Выполнить запись func(*args, **kwargs) одной транзакцией, по одной
+    на процесс, и повторять её при database is locked.
+    """
+    if connection.vendor != 'sqlite':
+        return func(*args, **kwargs)
+    retries = settings.SQLITE_WRITE_RETRIES
+    for attempt in range(retries + 1):
+        try:
+            with _write_lock, transaction.atomic():
+                return func(*args, **kwargs)
+        except OperationalError as error:
+            if attempt == retries or not is_locked(error):
+                raise
+        delay = settings.SQLITE_WRITE_BACKOFF * 2 ** attempt
+        time.sleep(delay * random.uniform(0.5, 1.5))
+    return None
+
+
+def save_files(instance):
+    """
+    Сохранить в хранилище ещё не записанные файлы объекта модели.
+    Повторный instance.save() их уже не сохраняет.
+    """
+    for field in instance._meta.concrete_fields:
+        if isinstance(field, models.FileField):
+            field.pre_save(instance, instance._state.adding)
+
+
+def serialized_write(view=None, *, all_methods=False):
+    """
+    Выполнять изменяющие запросы к SQLite по одному на процесс
+    и повторять их при database is locked. С all_methods=True так
+    выполняются и GET-запросы.
+    """
+    if view is None:
+        return partial(serialized_write, all_methods=all_methods)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method in SAFE_METHODS and not all_methods:
+            return view(request, *args, **kwargs)
+        return serialized(view, request, *args, **kwargs)
+    return wrapper
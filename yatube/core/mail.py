@@ -0,0 +1,44 @@
+"""
+Отправка писем через очередь задач.
+
+QueuedEmailBackend не ходит в SMTP во время запроса: каждое письмо
+сохраняется задачей в очереди high, а воркер отправляет его через
+TASKS_EMAIL_BACKEND и повторяет при ошибке сервера.
+"""
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .tasks import task
+
+
+@task(queue='high')
+def send_message(**data):
+    """Отправить письмо, сохранённое QueuedEmailBackend"""
+    alternatives = data.pop('alternatives', [])
+    message = EmailMultiAlternatives(
+        connection=get_connection(settings.TASKS_EMAIL_BACKEND), **data
+    )
+    for content, mimetype in alternatives:
+        message.attach_alternative(content, mimetype)
+    message.send()
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        for message in email_messages:
+            send_message.delay(
+                subject=message.subject,
+                body=message.body,
+                from_email=message.from_email,
+                to=message.to,
+                cc=message.cc,
+                bcc=message.bcc,
+                reply_to=message.reply_to,
+                headers=message.extra_headers,
+                alternatives=[
+                    list(alternative)
+                    for alternative in getattr(message, 'alternatives', [])
+                ],
+            )
+        return len(email_messages)
@@ -0,0 +1,139 @@
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
+from concurrent.futures.process import BrokenProcessPool
+
+from core import tasks, worker
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Выполнять задачи из очереди core.tasks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--queues',
+            default=','.join(settings.TASKS_QUEUES),
+            help='Очереди через запятую в порядке приоритета',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=settings.TASKS_CONCURRENCY,
+            help='Сколько задач выполнять одновременно',
+        )
+        parser.add_argument(
+            '--pool',
+            choices=('thread', 'process'),
+            default='thread',
+            help='Пул потоков (ввод-вывод) или процессов (Pillow и т. п.)',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Пауза в секундах, когда готовых задач нет',
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Выйти, когда готовые задачи закончатся',
+        )
+
+    def get_executor(self, pool, concurrency):
+        if pool == 'thread':
+            return ThreadPoolExecutor(max_workers=concurrency)
+        return ProcessPoolExecutor(
+            max_workers=concurrency,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=worker.init_process,
+            initargs=(os.environ['DJANGO_SETTINGS_MODULE'],),
+        )
+
+    def get_queues(self, value):
+        queues = [queue.strip() for queue in value.split(',')]
+        queues = [queue for queue in queues if queue]
+        unknown = set(queues) - set(settings.TASKS_QUEUES)
+        if unknown:
+            raise CommandError(
+                f'Неизвестные очереди: {", ".join(sorted(unknown))}'
+            )
+        return queues
+
+    def fill(self, running, queues, concurrency):
+        """Взять готовые задачи, пока в пуле есть свободные места"""
+        while len(running) < concurrency:
+            try:
+                task = tasks.claim(queues)
+            except DatabaseError:
+                # База занята или недоступна: попробуем на следующем круге
+                logger.exception('Не удалось взять задачу из очереди')
+                return
+            if task is None:
+                return
+            try:
+                future = self.executor.submit(worker.execute, task.pk)
+            except BrokenProcessPool:
+                # Задача вернётся в очередь через TASKS_LOCK_TIMEOUT
+                logger.exception('Пул воркера остановлен')
+                self.restart_executor()
+                return
+            running.add(future)
+
+    def restart_executor(self):
+        self.executor.shutdown(wait=False)
+        self.executor = self.get_executor(*self.pool_options)
+
+    def collect(self, finished):
+        """Число успешных задач среди завершённых; ошибки не роняют воркер"""
+        succeeded = 0
+        broken = False
+        for future in finished:
+            try:
+                succeeded += bool(future.result())
+            except BrokenProcessPool:
+                broken = True
+            except Exception:
+                logger.exception('Задача завершилась ошибкой воркера')
+        if broken:
+            logger.error('Пул воркера остановлен, запускаем новый')
+            self.restart_executor()
+        return succeeded
+
+    def handle(self, *args, **options):
+        queues = self.get_queues(options['queues'])
+        concurrency = max(1, options['concurrency'])
+        done = failed = 0
+        running = set()
+        self.pool_options = (options['pool'], concurrency)
+        self.executor = self.get_executor(*self.pool_options)
+        try:
+            while True:
+                self.fill(running, queues, concurrency)
+                if not running:
+                    if options['burst']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+                finished, running = wait(
+                    running,
+                    timeout=options['poll_interval'],
+                    return_when=FIRST_COMPLETED,
+                )
+                succeeded = self.collect(finished)
+                done += succeeded
+                failed += len(finished) - succeeded
+        except KeyboardInterrupt:
+            self.stdout.write('Остановка: ждём начатые задачи')
+        finally:
+            self.executor.shutdown(wait=True)
+        self.stdout.write(self.style.SUCCESS(
+            f'Выполнено задач: {done}, с ошибкой: {failed}'
+        ))
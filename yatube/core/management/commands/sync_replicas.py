@@ -0,0 +1,29 @@
+import time
+
+from core.db.replication import sync_replicas
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Скопировать основную SQLite-базу в реплики DATABASE_REPLICAS'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0,
+            help='Повторять копирование каждые N секунд (0 — один раз)',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('Реплики не настроены: задайте DB_REPLICAS')
+        while True:
+            aliases = sync_replicas()
+            self.stdout.write(
+                self.style.SUCCESS(f'Реплики обновлены: {", ".join(aliases)}')
+            )
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
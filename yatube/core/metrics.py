@@ -0,0 +1,236 @@
+"""
+Метрики запросов по view-функциям.
+
+MetricsMiddleware собирает для каждого запроса число SQL-запросов, время
+в базе, время отрисовки шаблонов и общее время, отдаёт их в заголовке
+Server-Timing и копит в гистограммах этого процесса по имени view
+(request.resolver_match.view_name). Снимок гистограмм отдаёт
+view-функция core.views.metrics. Время шаблонов замеряется, только
+если MetricsMiddleware есть в MIDDLEWARE.
+"""
+import math
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends import django as django_backend
+
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, math.inf)
+TIME_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, math.inf)
+UNRESOLVED = '<unresolved>'
+
+_local = threading.local()
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин"""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        for index, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[index] += 1
+                return
+
+    def quantile(self, q):
+        """Верхняя граница корзины, в которую попадает квантиль q"""
+        if not self.count:
+            return 0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return self.max if math.isinf(bound) else bound
+        return self.max
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'sum': round(self.total, 3),
+            'max': round(self.max, 3),
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'buckets': {
+                ('+Inf' if math.isinf(bound) else str(bound)): count
+                for bound, count in zip(self.bounds, self.counts)
+            },
+        }
+
+
+class ViewMetrics:
+    """Гистограммы одной view-функции"""
+
+    def __init__(self):
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db_ms = Histogram(TIME_BUCKETS)
+        self.template_ms = Histogram(TIME_BUCKETS)
+        self.total_ms = Histogram(TIME_BUCKETS)
+
+    def observe(self, sample):
+        self.queries.observe(sample.queries)
+        self.db_ms.observe(sample.db_ms)
+        self.template_ms.observe(sample.template_ms)
+        self.total_ms.observe(sample.total_ms)
+
+    def as_dict(self):
+        return {
+            'requests': self.total_ms.count,
+            'queries': self.queries.as_dict(),
+            'db_ms': self.db_ms.as_dict(),
+            'template_ms': self.template_ms.as_dict(),
+            'total_ms': self.total_ms.as_dict(),
+        }
+
+
+class Registry:
+    """Метрики всех view-функций процесса"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, view_name, sample):
+        with self._lock:
+            metrics = self._views.get(view_name)
+            if metrics is None:
+                metrics = self._views[view_name] = ViewMetrics()
+            metrics.observe(sample)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: metrics.as_dict()
+                for name, metrics in sorted(self._views.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+registry = Registry()
+
+
+class Sample:
+    """Замеры одного запроса"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.total_ms = 0.0
+
+    def merge(self, other):
+        """Добавить запросы и шаблоны, замеренные в другом потоке"""
+        self.queries += other.queries
+        self.db_ms += other.db_ms
+        self.template_ms += other.template_ms
+
+    def server_timing(self):
+        return ', '.join([
+            f'db;dur={self.db_ms:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template_ms:.1f}',
+            f'total;dur={self.total_ms:.1f}',
+        ])
+
+
+def _count_query(execute, sql, params, many, context):
+    sample = getattr(_local, 'sample', None)
+    if sample is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        sample.queries += 1
+        sample.db_ms += (time.perf_counter() - started) * 1000
+
+
+_render = django_backend.Template.render
+
+
+def _timed_render(self, context=None, request=None):
+    sample = getattr(_local, 'sample', None)
+    if sample is None or getattr(_local, 'rendering', False):
+        return _render(self, context, request)
+    _local.rendering = True
+    started = time.perf_counter()
+    try:
+        return _render(self, context, request)
+    finally:
+        _local.rendering = False
+        sample.template_ms += (time.perf_counter() - started) * 1000
+
+
+def time_templates():
+    """
+    Замерять отрисовку шаблонов бэкенда Django. Вызывается из
+    CoreConfig.ready(), если MetricsMiddleware включён.
+    """
+    # Шаблоны отрисовываются через бэкенд Django и в render(), и в
+    # TemplateResponse; вложенные render_to_string не считаются дважды
+    if django_backend.Template.render is not _timed_render:
+        django_backend.Template.render = _timed_render
+
+
+def current_sample():
+    return getattr(_local, 'sample', None)
+
+
+@contextmanager
+def collect_into(sample):
+    """Считать запросы и шаблоны текущего потока в замеры sample"""
+    previous = getattr(_local, 'sample', None)
+    _local.sample = sample
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                # execute_wrapper() снимает последнюю обёртку, а реплика,
+                # подключённая внутри блока, добавляет свою после нашей
+                connection.execute_wrappers.append(_count_query)
+                stack.callback(
+                    connection.execute_wrappers.remove, _count_query
+                )
+            yield sample
+    finally:
+        _local.sample = previous
+
+
+@contextmanager
+def measure():
+    """Собрать замеры запросов и шаблонов внутри блока"""
+    sample = Sample()
+    started = time.perf_counter()
+    try:
+        with collect_into(sample):
+            yield sample
+    finally:
+        sample.total_ms = (time.perf_counter() - started) * 1000
+
+
+class MetricsMiddleware:
+    """Замеры каждого запроса: заголовок Server-Timing и гистограммы"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with measure() as sample:
+            response = self.get_response(request)
+        match = getattr(request, 'resolver_match', None)
+        registry.record(match.view_name if match else UNRESOLVED, sample)
+        if settings.METRICS_SERVER_TIMING:
+            response['Server-Timing'] = sample.server_timing()
+        return response
@@ -0,0 +1,43 @@
+from django.db import models
+
+
+class Task(models.Model):
+    """Отложенный вызов функции для воркера run_worker"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Функция', max_length=200)
+    payload = models.TextField('Аргументы в JSON', default='{}')
+    queue = models.CharField('Очередь', max_length=20, default='default')
+    key = models.CharField(
+        'Ключ для защиты от дублей', max_length=200, blank=True
+    )
+    status = models.CharField(
+        'Статус', max_length=10, choices=STATUSES, default=QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField('Предел попыток')
+    run_at = models.DateTimeField('Выполнить не раньше')
+    locked_at = models.DateTimeField('Взята воркером', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Дата создания', auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['status', 'queue', 'run_at'],
+                name='task_status_queue_run_at_idx',
+            ),
+            models.Index(fields=['key'], name='task_key_idx'),
+        ]
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+
+    def __str__(self):
+        return f'{self.name} [{self.queue}, {self.status}]'
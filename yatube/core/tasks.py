@@ -0,0 +1,165 @@
+"""
+Очередь задач в базе данных.
+
+Функция, помеченная @task, получает метод delay(): вызов записывается
+строкой Task в той же транзакции, что и данные запроса, и выполняется
+воркером run_worker, а запрос не ждёт побочной работы. Очереди
+(TASKS_QUEUES) — полосы приоритета: воркер берёт задачу из следующей
+очереди, только если в предыдущих нет готовых.
+
+Упавшая задача возвращается в очередь с экспоненциальной задержкой
+TASKS_RETRY_BACKOFF * 2 ** (попытка - 1), после max_attempts попыток
+остаётся со статусом failed. Задача, взятая воркером, который умер,
+снова выдаётся через TASKS_LOCK_TIMEOUT секунд, а если попытки у неё
+кончились — получает статус failed. Выполненные задачи удаляются.
+
+С TASKS_EAGER = True delay() выполняет функцию сразу (разработка
+и тесты без воркера).
+"""
+import json
+import logging
+import random
+import traceback
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(name, args=(), kwargs=None, queue='default', countdown=0,
+            key='', max_attempts=None):
+    """
+    Поставить вызов функции name (путь для import_string) в очередь.
+    С непустым key задача не ставится, если такая уже ждёт выполнения.
+    """
+    if queue not in settings.TASKS_QUEUES:
+        raise ValueError(f'Неизвестная очередь задач: {queue}')
+    kwargs = kwargs or {}
+    if settings.TASKS_EAGER:
+        import_string(name)(*args, **kwargs)
+        return None
+    if key and Task.objects.filter(
+        key=key, status__in=(Task.QUEUED, Task.RUNNING)
+    ).exists():
+        return None
+    return Task.objects.create(
+        name=name,
+        payload=json.dumps({'args': list(args), 'kwargs': kwargs}),
+        queue=queue,
+        key=key,
+        max_attempts=max_attempts or settings.TASKS_MAX_ATTEMPTS,
+        run_at=timezone.now() + timedelta(seconds=countdown),
+    )
+
+
+def task(queue='default', max_attempts=None):
+    """
+    Декоратор функции-задачи. Функция по-прежнему вызывается напрямую,
+    а func.delay(*args, **kwargs) ставит вызов в очередь queue.
+    Аргументы должны сериализоваться в JSON.
+    """
+    def decorator(func):
+        name = f'{func.__module__}.{func.__qualname__}'
+
+        @wraps(func)
+        def delay(*args, **kwargs):
+            return enqueue(
+                name, args, kwargs, queue=queue, max_attempts=max_attempts
+            )
+
+        func.delay = delay
+        return func
+    return decorator
+
+
+def _stale(now):
+    return now - timedelta(seconds=settings.TASKS_LOCK_TIMEOUT)
+
+
+def _claimable(now):
+    return Q(status=Task.QUEUED) | Q(
+        status=Task.RUNNING,
+        locked_at__lt=_stale(now),
+        attempts__lt=F('max_attempts'),
+    )
+
+
+def _fail_abandoned(now):
+    """Брошенные задачи без оставшихся попыток перевести в failed"""
+    Task.objects.filter(
+        status=Task.RUNNING,
+        locked_at__lt=_stale(now),
+        attempts__gte=F('max_attempts'),
+    ).update(
+        status=Task.FAILED,
+        locked_at=None,
+        last_error='Воркер не завершил задачу за TASKS_LOCK_TIMEOUT секунд',
+    )
+
+
+def claim(queues):
+    """
+    Взять следующую готовую задачу: очереди по порядку, внутри очереди —
+    по run_at. Вернуть задачу или None.
+    """
+    now = timezone.now()
+    _fail_abandoned(now)
+    for queue in queues:
+        candidates = Task.objects.filter(
+            _claimable(now), queue=queue, run_at__lte=now
+        ).order_by('run_at', 'id').values_list('id', flat=True)[:10]
+        for task_id in list(candidates):
+            # Задачу получает тот воркер, чей UPDATE изменил строку;
+            # попытка считается сразу, чтобы задача, роняющая воркер,
+            # не выдавалась бесконечно
+            claimed = Task.objects.filter(
+                _claimable(now), pk=task_id
+            ).update(
+                status=Task.RUNNING,
+                locked_at=now,
+                attempts=F('attempts') + 1,
+            )
+            if claimed:
+                return Task.objects.get(pk=task_id)
+    return None
+
+
+def _backoff(attempts):
+    delay = settings.TASKS_RETRY_BACKOFF * 2 ** (attempts - 1)
+    return timedelta(seconds=delay * random.uniform(0.5, 1.5))
+
+
+def run(task_id):
+    """
+    Выполнить взятую задачу и записать результат, вернуть успех.
+    Получает только id, чтобы вызываться и в процессе пула воркера.
+    """
+    task = Task.objects.get(pk=task_id)
+    payload = json.loads(task.payload)
+    try:
+        # Упавшая задача не оставляет половины своих записей
+        with transaction.atomic():
+            import_string(task.name)(*payload['args'], **payload['kwargs'])
+    except Exception:
+        task.last_error = traceback.format_exc()
+        task.locked_at = None
+        if task.attempts >= task.max_attempts:
+            task.status = Task.FAILED
+            logger.exception('Задача %s не выполнена', task)
+        else:
+            task.status = Task.QUEUED
+            task.run_at = timezone.now() + _backoff(task.attempts)
+        task.save(
+            update_fields=['last_error', 'locked_at', 'status', 'run_at']
+        )
+        return False
+    task.delete()
+    return True
@@ -1,6 +1,55 @@
+import io
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import timedelta
 from http import HTTPStatus
+from unittest import mock
 
-from django.test import TestCase
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.db.utils import OperationalError
+from django.http import HttpResponse
+from django.template.backends import django as django_backend
+from django.test import (RequestFactory, SimpleTestCase, TestCase,
+                         TransactionTestCase, override_settings)
+from django.urls import reverse
+from django.utils import timezone
+from posts.models import Follow, Post
+
+from . import worker
+from .db.backends.sqlite3.base import DatabaseWrapper
+from .db.parallel import gather
+from .db.pool import ConnectionPool, PoolExhausted, get_pool
+from .db.replication import sync_replicas
+from .db.routers import (PIN_COOKIE, _in_flight, choose_replica, is_pinned,
+                         pin_to_primary)
+from .db.sqlite import serialized_write
+from .mail import QueuedEmailBackend
+from .metrics import current_sample, measure, registry, time_templates
+from .models import Task
+from .tasks import claim, run, task
+
+User = get_user_model()
+
+REPLICA = 'replica_test'
+
+calls = []
+
+
+@task()
+def record(value):
+    calls.append(value)
+
+
+@task(queue='low', max_attempts=2)
+def explode():
+    raise ValueError('Сбой задачи')
 
 
 class ViewTestClass(TestCase):
@@ -8,3 +57,424 @@ class ViewTestClass(TestCase):
         response = self.client.get('/nonexist-page/')
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class MetricsTestClass(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('tpl;dur=', response['Server-Timing'])
+
+    def test_metrics_grouped_by_view_name(self):
+        for _ in range(3):
+            self.client.get(reverse('posts:index'))
+        self.client.get('/nonexist-page/')
+        snapshot = registry.snapshot()
+        index = snapshot['posts:index']
+        self.assertEqual(index['requests'], 3)
+        self.assertEqual(index['queries']['count'], 3)
+        self.assertGreater(index['template_ms']['sum'], 0)
+        self.assertIn('<unresolved>', snapshot)
+
+    def test_template_timing_installed_once(self):
+        render = django_backend.Template.render
+        self.assertEqual(render.__name__, '_timed_render')
+        time_templates()
+        self.assertIs(django_backend.Template.render, render)
+
+    def test_metrics_endpoint_for_staff_only(self):
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(reverse('core:metrics'))
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        admin = User.objects.create_user(username='admin', is_staff=True)
+        self.client.force_login(admin)
+        response = self.client.get(reverse('core:metrics'), {'reset': 1})
+        self.assertIn('posts:index', response.json()['views'])
+        self.assertNotIn('posts:index', registry.snapshot())
+
+
+class ConnectionPoolTestClass(SimpleTestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def connect(self):
+        return sqlite3.connect(self.path, check_same_thread=False)
+
+    def test_connections_reused_and_bounded(self):
+        pool = ConnectionPool(self.connect, max_size=1, timeout=0.01)
+        raw = pool.acquire()
+        with self.assertRaises(PoolExhausted):
+            pool.acquire()
+        pool.release(raw)
+        self.assertIs(pool.acquire(), raw)
+        stats = pool.stats()
+        self.assertEqual(stats['created'], 1)
+        self.assertEqual(stats['reused'], 1)
+        self.assertEqual(stats['timeouts'], 1)
+
+    def test_broken_connection_replaced_after_health_check(self):
+        pool = ConnectionPool(
+            self.connect, max_size=1, health_check_interval=0
+        )
+        raw = pool.acquire()
+        pool.release(raw)
+        raw.close()
+        fresh = pool.acquire()
+        self.assertIsNot(fresh, raw)
+        fresh.execute('SELECT 1')
+        self.assertEqual(pool.stats()['discarded'], 1)
+
+    def test_backend_returns_connections_to_pool(self):
+        settings_dict = {
+            **connection.settings_dict,
+            'NAME': self.path,
+            'POOL': {'MAX_SIZE': 1},
+        }
+        wrapper = DatabaseWrapper(settings_dict, alias='pool-test')
+        for _ in range(3):
+            with wrapper.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            wrapper.close()
+        stats = get_pool(('pool-test', self.path), None).stats()
+        self.assertEqual(stats['created'], 1)
+        self.assertEqual(stats['reused'], 2)
+        self.assertEqual(stats['idle'], 1)
+        get_pool(('pool-test', self.path), None).close()
+
+
+class SQLiteTuningTestClass(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_pragmas_applied_to_connection(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(
+                cursor.fetchone()[0],
+                settings.SQLITE_PRAGMAS['busy_timeout'],
+            )
+
+    @override_settings(SQLITE_WRITE_BACKOFF=0)
+    def test_write_retried_while_database_locked(self):
+        view = mock.Mock(side_effect=[
+            OperationalError('database is locked'),
+            HttpResponse('ok'),
+        ])
+        response = serialized_write(view)(self.factory.post('/'))
+        self.assertEqual(response.content, b'ok')
+        self.assertEqual(view.call_count, 2)
+
+    @override_settings(SQLITE_WRITE_BACKOFF=0, SQLITE_WRITE_RETRIES=2)
+    def test_write_error_raised_after_retries(self):
+        view = mock.Mock(side_effect=OperationalError('database is locked'))
+        with self.assertRaises(OperationalError):
+            serialized_write(view)(self.factory.post('/'))
+        self.assertEqual(view.call_count, 3)
+        view = mock.Mock(side_effect=OperationalError('no such table'))
+        with self.assertRaises(OperationalError):
+            serialized_write(view)(self.factory.post('/'))
+        self.assertEqual(view.call_count, 1)
+
+    def test_safe_methods_not_serialized(self):
+        view = mock.Mock(side_effect=OperationalError('database is locked'))
+        with self.assertRaises(OperationalError):
+            serialized_write(view)(self.factory.get('/'))
+        self.assertEqual(view.call_count, 1)
+
+    @override_settings(SQLITE_WRITE_BACKOFF=0)
+    def test_get_writes_serialized_when_marked(self):
+        view = mock.Mock(side_effect=[
+            OperationalError('database is locked'),
+            HttpResponse('ok'),
+        ])
+        wrapped = serialized_write(all_methods=True)(view)
+        self.assertEqual(wrapped(self.factory.get('/')).content, b'ok')
+        self.assertEqual(view.call_count, 2)
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class ReplicaRouterTestClass(TransactionTestCase):
+    # Снимок backup API нельзя снять внутри открытой транзакции TestCase
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(author=self.author, text='Реплика')
+        handle, self.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        connections.databases[REPLICA] = {
+            **connections.databases['default'],
+            'NAME': self.path,
+        }
+        sync_replicas()
+
+    def tearDown(self):
+        connections[REPLICA].close()
+        del connections.databases[REPLICA]
+        delattr(connections._connections, REPLICA)
+        os.remove(self.path)
+
+    def test_reads_routed_to_replica(self):
+        self.assertEqual(Post.objects.get(pk=self.post.pk)._state.db, REPLICA)
+        self.assertEqual(User.objects.get(pk=self.author.pk)._state.db,
+                         'default')
+        fresh = Post.objects.create(author=self.author, text='Не скопирован')
+        self.assertEqual(fresh._state.db, 'default')
+        self.assertFalse(Post.objects.filter(pk=fresh.pk).exists())
+        with pin_to_primary():
+            self.assertTrue(Post.objects.filter(pk=fresh.pk).exists())
+        sync_replicas()
+        self.assertTrue(Post.objects.filter(pk=fresh.pk).exists())
+
+    def test_reads_pinned_to_primary_after_write(self):
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        self.client.force_login(self.author)
+        response = self.client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Свежий комментарий'},
+        )
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertContains(self.client.get(url), 'Свежий комментарий')
+        del self.client.cookies[PIN_COOKIE]
+        # Истекло и окно, в котором сброшенные страницы читают default
+        cache.clear()
+        self.assertNotContains(self.client.get(url), 'Свежий комментарий')
+
+    def test_cache_filled_from_primary_after_write(self):
+        url = reverse('posts:index')
+        self.assertEqual(self.client.get(url)['X-Page-Cache'], 'miss')
+        Post.objects.create(author=self.author, text='Свежий пост')
+        response = self.client.get(url)
+        self.assertContains(response, 'Свежий пост')
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertEqual(self.client.get(url)['X-Page-Cache'], 'hit')
+
+    def test_follow_on_get_pinned_to_primary(self):
+        reader = User.objects.create_user(username='reader')
+        sync_replicas()
+        self.client.force_login(reader)
+        response = self.client.get(
+            reverse('posts:profile_follow', args=[self.author.username])
+        )
+        self.assertIn(PIN_COOKIE, response.cookies)
+        # Отписка находит подписку и без cookie, хотя реплика отстала
+        del self.client.cookies[PIN_COOKIE]
+        response = self.client.get(
+            reverse('posts:profile_unfollow', args=[self.author.username])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertFalse(Follow.objects.using('default').exists())
+
+    def test_metrics_survive_replica_connecting_mid_request(self):
+        connections[REPLICA].close()
+        delattr(connections._connections, REPLICA)
+        with measure():
+            Post.objects.count()
+        with measure() as sample:
+            Post.objects.count()
+        self.assertEqual(sample.queries, 1)
+
+    @override_settings(REPLICA_STRATEGY='least_loaded')
+    def test_least_loaded_strategy(self):
+        replicas = {'a': 2, 'b': 0, 'c': 1}
+        with override_settings(DATABASE_REPLICAS=list(replicas)):
+            with mock.patch.dict(_in_flight, replicas):
+                self.assertEqual({choose_replica() for _ in range(3)}, {'b'})
+            with override_settings(REPLICA_STRATEGY='round_robin'):
+                self.assertEqual(
+                    {choose_replica() for _ in range(3)}, set(replicas)
+                )
+
+    def test_replica_tracked_once_per_connection(self):
+        replica = connections[REPLICA]
+        replica.ensure_connection()
+        wrappers = list(replica.execute_wrappers)
+        replica.close()
+        replica.ensure_connection()
+        self.assertEqual(replica.execute_wrappers, wrappers)
+        self.assertEqual(len(wrappers), 1)
+
+
+class TaskQueueTestClass(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_delay_queues_call(self):
+        queued = record.delay('значение')
+        self.assertEqual(queued.name, 'core.test.record')
+        self.assertEqual(queued.status, Task.QUEUED)
+        self.assertEqual(calls, [])
+        self.assertEqual(claim(['default']).pk, queued.pk)
+        self.assertTrue(run(queued.pk))
+        self.assertEqual(calls, ['значение'])
+        self.assertFalse(Task.objects.exists())
+
+    def test_queues_claimed_by_priority(self):
+        low = explode.delay()
+        default = record.delay(1)
+        queues = settings.TASKS_QUEUES
+        self.assertEqual(claim(queues).pk, default.pk)
+        self.assertEqual(claim(queues).pk, low.pk)
+        self.assertIsNone(claim(queues))
+
+    def test_failed_task_retried_with_backoff(self):
+        queued = explode.delay()
+        self.assertFalse(run(claim(['low']).pk))
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.QUEUED)
+        self.assertIn('Сбой задачи', queued.last_error)
+        self.assertGreater(queued.run_at, timezone.now())
+        self.assertIsNone(claim(['low']))
+        Task.objects.update(run_at=timezone.now() - timedelta(seconds=1))
+        with self.assertLogs('core.tasks', 'ERROR'):
+            self.assertFalse(run(claim(['low']).pk))
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.FAILED)
+        self.assertEqual(queued.attempts, 2)
+        self.assertIsNone(claim(['low']))
+
+    def test_abandoned_task_claimed_again(self):
+        queued = record.delay(1)
+        claim(['default'])
+        self.assertIsNone(claim(['default']))
+        Task.objects.update(locked_at=timezone.now() - timedelta(
+            seconds=settings.TASKS_LOCK_TIMEOUT + 1
+        ))
+        self.assertEqual(claim(['default']).pk, queued.pk)
+
+    def test_abandoned_task_without_attempts_failed(self):
+        stale = timezone.now() - timedelta(
+            seconds=settings.TASKS_LOCK_TIMEOUT + 1
+        )
+        abandoned = Task.objects.create(
+            name='core.test.record', status=Task.RUNNING, attempts=1,
+            max_attempts=1, run_at=stale, locked_at=stale,
+        )
+        self.assertIsNone(claim(['default']))
+        abandoned.refresh_from_db()
+        self.assertEqual(abandoned.status, Task.FAILED)
+        self.assertIn('TASKS_LOCK_TIMEOUT', abandoned.last_error)
+
+    def test_unknown_queue_rejected(self):
+        def noop():
+            pass
+
+        with self.assertRaises(ValueError):
+            task(queue='urgent')(noop).delay()
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_mode(self):
+        self.assertIsNone(record.delay(1))
+        self.assertEqual(calls, [1])
+        self.assertFalse(Task.objects.exists())
+
+    @override_settings(
+        TASKS_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'
+    )
+    def test_queued_email_sent_by_worker(self):
+        mail.send_mail(
+            'Тема', 'Текст', 'from@example.com', ['to@example.com'],
+            connection=QueuedEmailBackend(),
+            html_message='<p>Текст</p>',
+        )
+        self.assertEqual(mail.outbox, [])
+        self.assertTrue(run(claim(['high']).pk))
+        self.assertEqual(len(mail.outbox), 1)
+        message = mail.outbox[0]
+        self.assertEqual(message.subject, 'Тема')
+        self.assertEqual(message.to, ['to@example.com'])
+        self.assertEqual(message.alternatives, [('<p>Текст</p>', 'text/html')])
+
+
+class RunWorkerTestClass(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_burst_runs_ready_tasks(self):
+        for value in range(3):
+            record.delay(value)
+        explode.delay()
+        Task.objects.create(
+            name='core.test.record', payload='{"args": [9], "kwargs": {}}',
+            max_attempts=1, run_at=timezone.now() + timedelta(hours=1),
+        )
+        out = io.StringIO()
+        # Тестовая база в памяти не пускает двух писателей сразу
+        call_command('run_worker', '--burst', '--concurrency=1', stdout=out)
+        self.assertEqual(
+            Task.objects.get(name='core.test.explode').status, Task.QUEUED
+        )
+        self.assertEqual(sorted(calls), [0, 1, 2])
+        self.assertIn('Выполнено задач: 3, с ошибкой: 1', out.getvalue())
+        self.assertEqual(Task.objects.count(), 2)
+
+    def test_worker_survives_pool_errors(self):
+        doomed = record.delay(1)
+        record.delay(2)
+        execute = worker.execute
+
+        def flaky(task_id):
+            if task_id == doomed.pk:
+                raise Task.DoesNotExist('Задачу удалили в админке')
+            return execute(task_id)
+
+        out = io.StringIO()
+        with mock.patch.object(worker, 'execute', flaky):
+            with self.assertLogs('core.management.commands.run_worker'):
+                call_command(
+                    'run_worker', '--burst', '--concurrency=1', stdout=out
+                )
+        self.assertEqual(calls, [2])
+        self.assertIn('Выполнено задач: 1, с ошибкой: 1', out.getvalue())
+
+
+class ParallelQueriesTestClass(TransactionTestCase):
+    def test_gather_runs_in_pool_threads(self):
+        main = threading.get_ident()
+        results = gather(
+            threading.get_ident,
+            lambda: Post.objects.count(),
+            threading.get_ident,
+        )
+        self.assertEqual(results[0], main)
+        self.assertEqual(results[1], 0)
+        self.assertNotEqual(results[2], main)
+
+    def test_pin_and_metrics_follow_into_pool(self):
+        with measure() as sample, pin_to_primary():
+            pinned = gather(is_pinned, is_pinned, lambda: Post.objects.count())
+        self.assertEqual(pinned[:2], [True, True])
+        # Запрос выполнен только в потоке пула
+        self.assertGreaterEqual(sample.queries, 1)
+
+    def test_pool_threads_measure_into_own_sample(self):
+        with measure() as sample:
+            samples = gather(current_sample, current_sample)
+        self.assertIs(samples[0], sample)
+        self.assertIsNotNone(samples[1])
+        self.assertIsNot(samples[1], sample)
+
+    def test_inline_inside_transaction(self):
+        author = User.objects.create_user(username='author')
+        with transaction.atomic():
+            Post.objects.create(author=author, text='Не зафиксирован')
+            main = threading.get_ident()
+            results = gather(
+                threading.get_ident, lambda: Post.objects.count()
+            )
+        self.assertEqual(results, [main, 1])
+
+    @override_settings(PARALLEL_QUERY_WORKERS=0)
+    def test_disabled(self):
+        main = threading.get_ident()
+        self.assertEqual(
+            gather(threading.get_ident, threading.get_ident), [main, main]
+        )
@@ -1,5 +1,12 @@
+import os
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.shortcuts import render
 
+from .db.pool import pool_stats
+from .metrics import registry
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -15,3 +22,15 @@ def server_error(request):
 
 def permission_denied(request, exception):
     return render(request, 'core/403.html', status=403)
+
+
+@staff_member_required
+def metrics(request):
+    """Снимок метрик view-функций этого процесса; ?reset=1 обнуляет их"""
+    snapshot = registry.snapshot()
+    if request.GET.get('reset'):
+        registry.reset()
+    return JsonResponse(
+        {'pid': os.getpid(), 'views': snapshot, 'db_pools': pool_stats()},
+        json_dumps_params={'ensure_ascii': False},
+    )
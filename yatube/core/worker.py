@@ -0,0 +1,26 @@
+"""
+Точки входа пула воркера run_worker.
+
+Модуль не импортирует модели при загрузке: процесс пула запускается
+через spawn и сначала выполняет init_process, который настраивает
+Django, и только потом получает задачи.
+"""
+import os
+
+
+def init_process(settings_module):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def execute(task_id):
+    """Выполнить задачу в потоке или процессе пула"""
+    from django.db import close_old_connections
+
+    from .tasks import run
+    close_old_connections()
+    try:
+        return run(task_id)
+    finally:
+        close_old_connections()
@@ -1,6 +1,8 @@
 from django.contrib import admin
 
 from .models import Comment, Follow, Group, Post
+from .search import search_posts
+from .stats import stats_for
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -18,6 +20,12 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        """Искать по поисковому индексу, а не через LIKE '%...%'"""
+        if not search_term:
+            return queryset, False
+        return search_posts(queryset, search_term), False
+
 
 class GroupAdmin(admin.ModelAdmin):
     """Настройки отображения модели Group в интерфейсе админа"""
@@ -36,14 +44,15 @@ class CommentAdmin(admin.ModelAdmin):
 class FollowAdmin(admin.ModelAdmin):
     """Настройки отображения модели Follow в интерфейсе админа"""
     list_display = ('author', 'user', 'total_follower', 'total_following', )
+    list_select_related = ('author__stats', 'user')
     search_fields = ('author',)
     empty_value_display = '-пусто-'
 
     def total_follower(self, obj):
-        return obj.author.following.count()
+        return stats_for(obj.author).followers_count
 
     def total_following(self, obj):
-        return obj.author.follower.count()
+        return stats_for(obj.author).following_count
 
 
 admin.site.register(Post, PostAdmin)
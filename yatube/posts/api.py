@@ -0,0 +1,247 @@
+"""
+JSON API только для чтения: /api/v1/.
+
+Ленты берутся теми же запросами и листаются тем же CursorPaginator,
+что и HTML-страницы, а ETag и кэш страниц для гостей строятся по тем же
+тегам feed_cache, поэтому API не отрисовывает шаблоны и не делает
+лишних запросов.
+
+Параметр fields задаёт список полей через запятую (sparse fieldsets):
+поля, которые клиент не запросил, не вычисляются и не передаются.
+Ответ сериализуется без пробелов и с UTF-8 вместо \\uXXXX.
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import condition, require_safe
+
+from . import feed_cache, follow_cache, page_cache, timeline, views
+from .models import Group, Post
+from .paginator import CursorPaginator
+from .stats import comments_count, stats_for
+
+COMPACT = {'separators': (',', ':'), 'ensure_ascii': False}
+
+POST_FIELDS = {
+    'id': lambda post: post.pk,
+    'author': lambda post: post.author.username,
+    'author_name': lambda post: post.author.get_full_name(),
+    'group': lambda post: post.group.slug if post.group_id else None,
+    'text': lambda post: post.text,
+    'pub_date': lambda post: post.pub_date,
+    'image': lambda post: post.image.url if post.image else None,
+    'comments_count': lambda post: comments_count(post.pk),
+}
+# Комментарии сбрасывают только тег поста, а не тег ленты, поэтому
+# в лентах (кэш и ETag по тегам ленты) числа комментариев нет
+FEED_POST_FIELDS = {
+    name: getter
+    for name, getter in POST_FIELDS.items()
+    if name != 'comments_count'
+}
+DEFAULT_POST_FIELDS = (
+    'id', 'author', 'author_name', 'group', 'text', 'pub_date', 'image',
+)
+
+COMMENT_FIELDS = {
+    'id': lambda comment: comment.pk,
+    'author': lambda comment: comment.author.username,
+    'text': lambda comment: comment.text,
+    'created': lambda comment: comment.created,
+}
+
+GROUP_FIELDS = {
+    'slug': lambda group: group.slug,
+    'title': lambda group: group.title,
+    'description': lambda group: group.description,
+}
+
+
+class InvalidFields(ValueError):
+    """В параметре fields есть неизвестные поля"""
+
+
+def _response(data, status=200):
+    return JsonResponse(data, status=status, json_dumps_params=COMPACT)
+
+
+def api_view(view):
+    """Только GET и HEAD, ошибки — в JSON"""
+    @require_safe
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except Http404:
+            return _response({'detail': 'Не найдено'}, status=404)
+        except InvalidFields as error:
+            return _response({'detail': str(error)}, status=400)
+    return wrapper
+
+
+def api_login_required(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return _response(
+                {'detail': 'Требуется авторизация'}, status=401
+            )
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def requested_fields(request, available, default=None):
+    """Поля из параметра fields или поля по умолчанию"""
+    fields = request.GET.get('fields')
+    if not fields:
+        return list(default or available)
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise InvalidFields(f'Неизвестные поля: {", ".join(unknown)}')
+    return names
+
+
+def serialize(obj, getters, fields):
+    return {name: getters[name](obj) for name in fields}
+
+
+def page_response(request, paginator, getters, default=None):
+    fields = requested_fields(request, getters, default)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    return _response({
+        'results': [serialize(obj, getters, fields) for obj in page_obj],
+        'next_cursor': page_obj.next_cursor,
+        'previous_cursor': page_obj.previous_cursor,
+    })
+
+
+def feed_response(request, posts):
+    paginator = CursorPaginator(posts.for_feed(), settings.POSTS_PAGE_LIMIT)
+    return page_response(
+        request, paginator, FEED_POST_FIELDS, DEFAULT_POST_FIELDS
+    )
+
+
+def comments_etag(request, post_id):
+    return feed_cache.etag(request, feed_cache.post_tag(post_id))
+
+
+def groups_tags(request):
+    return [feed_cache.GROUPS]
+
+
+def groups_etag(request):
+    return feed_cache.etag(request, *groups_tags(request))
+
+
+def profile_etag(request, username):
+    # Счётчики подписчиков меняются без сброса тегов автора
+    stats = stats_for(views.page_author(request, username))
+    return '-'.join([
+        views.profile_etag(request, username),
+        str(stats.followers_count),
+        str(stats.following_count),
+    ])
+
+
+def profile_posts_etag(request, username):
+    return feed_cache.etag(request, *views.profile_tags(request, username))
+
+
+def follow_etag(request):
+    return feed_cache.etag(
+        request, feed_cache.INDEX, feed_cache.follower_tag(request.user.pk)
+    )
+
+
+@api_view
+@page_cache.cache_anonymous(views.index_tags)
+@condition(etag_func=views.index_etag)
+def post_list(request):
+    return feed_response(request, Post.objects.all())
+
+
+@api_view
+@page_cache.cache_anonymous(views.post_detail_tags)
+@condition(etag_func=views.post_detail_etag)
+def post_detail(request, post_id):
+    post = views.page_post(request, post_id)
+    fields = requested_fields(request, POST_FIELDS, DEFAULT_POST_FIELDS)
+    return _response(serialize(post, POST_FIELDS, fields))
+
+
+@api_view
+@condition(etag_func=comments_etag)
+def post_comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('id'), id=post_id)
+    fields = requested_fields(request, COMMENT_FIELDS)
+    comments = views.comments_page(request, post)
+    return _response({
+        'results': [
+            serialize(comment, COMMENT_FIELDS, fields)
+            for comment in comments
+        ],
+        'next_cursor': comments.next_cursor,
+        'previous_cursor': comments.previous_cursor,
+    })
+
+
+@api_view
+@page_cache.cache_anonymous(groups_tags)
+@condition(etag_func=groups_etag)
+def group_list(request):
+    paginator = CursorPaginator(
+        Group.objects.order_by('id'), settings.POSTS_PAGE_LIMIT,
+        ordering=('id',),
+    )
+    return page_response(request, paginator, GROUP_FIELDS)
+
+
+@api_view
+@page_cache.cache_anonymous(views.group_tags)
+@condition(etag_func=views.group_etag)
+def group_posts(request, slug):
+    return feed_response(request, views.page_group(request, slug).posts)
+
+
+@api_view
+@condition(etag_func=profile_etag)
+def profile(request, username):
+    author = views.page_author(request, username)
+    stats = stats_for(author)
+    getters = {
+        'username': lambda author: author.username,
+        'name': lambda author: author.get_full_name(),
+        'posts_count': lambda author: stats.posts_count,
+        'followers_count': lambda author: stats.followers_count,
+        'following_count': lambda author: stats.following_count,
+        'following': lambda author: (
+            author.pk in follow_cache.followed_ids(request.user)
+        ),
+    }
+    fields = requested_fields(request, getters)
+    return _response(serialize(author, getters, fields))
+
+
+@api_view
+@page_cache.cache_anonymous(views.profile_tags)
+@condition(etag_func=profile_posts_etag)
+def profile_posts(request, username):
+    return feed_response(
+        request, views.page_author(request, username).posts
+    )
+
+
+@api_view
+@api_login_required
+@condition(etag_func=follow_etag)
+def follow_index(request):
+    paginator = timeline.follow_paginator(
+        request.user, settings.POSTS_PAGE_LIMIT
+    )
+    return page_response(
+        request, paginator, FEED_POST_FIELDS, DEFAULT_POST_FIELDS
+    )
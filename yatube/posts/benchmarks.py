@@ -0,0 +1,128 @@
+"""
+Запросы страниц приложения posts для EXPLAIN и замеров.
+
+Запросы строятся теми же средствами, что и во view-функциях
+(for_feed, follow_paginator, CursorPaginator), поэтому план запроса
+здесь совпадает с планом на живой странице.
+"""
+import math
+from collections import namedtuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count
+from django.urls import reverse
+
+from . import timeline
+from .models import Group, Post
+from .paginator import CursorPaginator
+from .urls import app_name, urlpatterns
+
+User = get_user_model()
+
+Sample = namedtuple('Sample', 'group author reader post')
+
+
+def get_sample():
+    """Самые наполненные группа, автор, читатель и пост в базе"""
+    group = Group.objects.annotate(
+        total=Count('posts')
+    ).order_by('-total').first()
+    author = User.objects.filter(
+        stats__isnull=False
+    ).order_by('-stats__posts_count').first()
+    reader = User.objects.filter(
+        stats__isnull=False
+    ).order_by('-stats__following_count').first()
+    post = Post.objects.annotate(
+        total=Count('comments')
+    ).order_by('-total').first()
+    if None in (group, author, reader, post):
+        return None
+    return Sample(group, author, reader, post)
+
+
+def _deep_position(paginator, depth):
+    """Позиция курсора на глубине depth строк (или None, если ленты мало)"""
+    rows = paginator.object_list.order_by(
+        *paginator.ordering
+    ).values_list(*paginator.fields)[depth:depth + 1]
+    rows = list(rows)
+    return list(rows[0]) if rows else None
+
+
+def view_queries(sample, depth=1000):
+    """
+    Вернуть список (имя view, страница, queryset) для первой
+    и глубокой страницы каждой ленты и для комментариев поста.
+    """
+    limit = settings.POSTS_PAGE_LIMIT
+    paginators = {
+        'posts:index': CursorPaginator(Post.objects.for_feed(), limit),
+        'posts:group_list': CursorPaginator(
+            sample.group.posts.for_feed(), limit
+        ),
+        'posts:profile': CursorPaginator(
+            sample.author.posts.for_feed(), limit
+        ),
+        'posts:follow_index': timeline.follow_paginator(sample.reader, limit),
+    }
+    queries = []
+    for name, paginator in paginators.items():
+        queries.append((name, 'first', paginator.page_queryset()))
+        position = _deep_position(paginator, depth)
+        if position is not None:
+            queries.append(
+                (name, f'depth {depth}', paginator.page_queryset(position))
+            )
+    paginator = CursorPaginator(
+        sample.post.comments.select_related('author'),
+        settings.COMMENTS_PAGE_LIMIT,
+        ordering=('-created', '-id'),
+    )
+    queries.append(
+        ('posts:post_detail', 'comments', paginator.page_queryset())
+    )
+    return queries
+
+
+def url_cases(sample):
+    """
+    Вернуть список (имя url, адрес) для каждого маршрута posts/urls.py.
+    Подписка и отписка идут парой на автора, на которого читатель
+    не подписан, чтобы повторные замеры не меняли данные.
+    """
+    target = User.objects.exclude(
+        pk=sample.reader.pk
+    ).exclude(following__user=sample.reader).first() or sample.author
+    own_post = Post.objects.filter(author=sample.reader).first()
+    values = {
+        'slug': sample.group.slug,
+        'username': sample.author.username,
+        'post_id': sample.post.pk,
+        'section': 'posts',
+        'number': sample.post.pk // settings.SITEMAP_CHUNK_SIZE,
+    }
+    overrides = {
+        'profile_follow': {'username': target.username},
+        'profile_unfollow': {'username': target.username},
+        'post_edit': {'post_id': (own_post or sample.post).pk},
+    }
+    cases = []
+    for pattern in urlpatterns:
+        kwargs = {
+            name: values[name] for name in pattern.pattern.converters
+        }
+        kwargs.update(overrides.get(pattern.name, {}))
+        name = f'{app_name}:{pattern.name}'
+        cases.append((name, reverse(name, kwargs=kwargs)))
+    return cases
+
+
+def percentile(values, q):
+    """Перцентиль q (0–100) по методу ближайшего ранга"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
@@ -0,0 +1,128 @@
+"""
+Поколения кэша лент.
+
+Каждой области (вся лента, группа, автор, пост) соответствует счётчик
+в кэше. Сигналы увеличивают счётчики при изменении постов и групп,
+а ключи фрагментов шаблонов включают текущие значения счётчиков,
+поэтому устаревший фрагмент просто перестаёт читаться.
+
+Сброс виден всем процессам только в общем кэше (CACHE_SHARED): тогда
+счётчики бессрочны, а TTL фрагментов большой. С кэшем в памяти
+процесса счётчики живут COUNTER_CACHE_TIMEOUT секунд, и другие
+процессы получают новое поколение не позже этого срока.
+
+Реплики (core.db.routers) догоняют запись не сразу, поэтому тег,
+сброшенный меньше REPLICA_PIN_SECONDS назад, считается изменённым
+недавно: страницы с ним page_cache отрисовывает из основной базы, чтобы
+не сохранить под новым поколением данные отставшей реплики.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+KEY_PREFIX = 'feed-generation'
+CHANGED_PREFIX = 'feed-changed'
+GROUPS = 'groups'
+INDEX = 'index'
+
+
+def group_tag(group_id):
+    return f'group:{group_id}'
+
+
+def author_tag(author_id):
+    return f'author:{author_id}'
+
+
+def post_tag(post_id):
+    return f'post:{post_id}'
+
+
+def follower_tag(user_id):
+    return f'follower:{user_id}'
+
+
+def post_tags(post):
+    """Теги всех лент, в которых показывается пост"""
+    tags = [INDEX, author_tag(post.author_id), post_tag(post.pk)]
+    if post.group_id:
+        tags.append(group_tag(post.group_id))
+    return tags
+
+
+def _key(tag):
+    return f'{KEY_PREFIX}:{tag}'
+
+
+def _initial():
+    # Начальное значение зависит от времени, чтобы после вытеснения
+    # счётчика из кэша не прочитались фрагменты старого поколения
+    return int(time.time() * 1000)
+
+
+def get_generations(*tags):
+    """Вернуть текущие поколения для тегов, создавая недостающие"""
+    keys = [_key(tag) for tag in tags]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            value = _initial()
+            if not cache.add(
+                key, value, timeout=settings.COUNTER_CACHE_TIMEOUT
+            ):
+                value = cache.get(key, value)
+            generations[key] = value
+    return [generations[key] for key in keys]
+
+
+def bump(*tags):
+    """Сбросить кэш для тегов, увеличив их поколения"""
+    for tag in tags:
+        key = _key(tag)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(
+                key, _initial(), timeout=settings.COUNTER_CACHE_TIMEOUT
+            )
+    if settings.DATABASE_REPLICAS:
+        cache.set_many(
+            {f'{CHANGED_PREFIX}:{tag}': True for tag in tags},
+            settings.REPLICA_PIN_SECONDS,
+        )
+
+
+def changed_recently(*tags):
+    """Реплики могут ещё не содержать последних изменений тегов"""
+    if not settings.DATABASE_REPLICAS:
+        return False
+    return bool(cache.get_many([f'{CHANGED_PREFIX}:{tag}' for tag in tags]))
+
+
+def fragment_key(request, *tags):
+    """
+    Ключ фрагмента ленты: поколения тегов и курсор страницы. Гости
+    делят один фрагмент, а у пользователя он свой: в нём переключатель
+    лент и кнопки подписки, которые зависят от его подписок.
+    """
+    if request.user.is_authenticated:
+        tags = (*tags, follower_tag(request.user.pk))
+    parts = [
+        f'{tag}={generation}'
+        for tag, generation in zip(tags, get_generations(*tags))
+    ]
+    parts.append(request.GET.get('cursor', ''))
+    parts.append(str(request.user.pk or 0))
+    return ':'.join(parts)
+
+
+def etag(request, *tags):
+    """
+    ETag страницы: поколения тегов и пользователь, для которого она
+    отрисована. Считается без запросов к базе.
+    """
+    parts = [str(generation) for generation in get_generations(*tags)]
+    parts.append(str(request.user.pk or 0))
+    return hashlib.md5(':'.join(parts).encode()).hexdigest()
@@ -0,0 +1,129 @@
+"""
+RSS- и Atom-ленты: последние посты сайта, группы и автора.
+
+Ленты строятся из тех же запросов, что и HTML-страницы, и отдаются
+через кэш страниц для гостей и ETag по тегам feed_cache: сигналы
+сбрасывают их вместе со страницами, а опрос без изменений стоит
+одного чтения кэша или ответа 304.
+"""
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.views.decorators.http import condition
+
+from . import feed_cache, page_cache, views
+from .models import Post
+
+
+class LatestPostsFeed(Feed):
+    title = 'Yatube: последние записи'
+    description = 'Последние записи на сайте Yatube'
+
+    def link(self):
+        return reverse('posts:index')
+
+    def items(self):
+        return Post.objects.for_feed()[:settings.FEED_ITEMS_LIMIT]
+
+    def item_title(self, item):
+        return item.text[:settings.POST_TITLE_LIMIT]
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', args=[item.pk])
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_categories(self, item):
+        return [item.group.title] if item.group_id else []
+
+
+class GroupPostsFeed(LatestPostsFeed):
+    def get_object(self, request, slug):
+        return views.page_group(request, slug)
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse('posts:group_list', args=[group.slug])
+
+    def items(self, group):
+        return group.posts.for_feed()[:settings.FEED_ITEMS_LIMIT]
+
+
+class AuthorPostsFeed(LatestPostsFeed):
+    def get_object(self, request, username):
+        return views.page_author(request, username)
+
+    def title(self, author):
+        return f'Yatube: {author.get_full_name() or author.username}'
+
+    def description(self, author):
+        return f'Записи пользователя {author.username}'
+
+    def link(self, author):
+        return reverse('posts:profile', args=[author.username])
+
+    def items(self, author):
+        return author.posts.for_feed()[:settings.FEED_ITEMS_LIMIT]
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class GroupPostsAtomFeed(GroupPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, group):
+        return group.description
+
+
+class AuthorPostsAtomFeed(AuthorPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, author):
+        return self.description(author)
+
+
+def profile_feed_etag(request, username):
+    return feed_cache.etag(request, *views.profile_tags(request, username))
+
+
+def cached_feed(feed, tags_func, etag_func):
+    """Лента с кэшем для гостей и условным GET по тегам страницы"""
+    return page_cache.cache_anonymous(tags_func)(
+        condition(etag_func=etag_func)(feed)
+    )
+
+
+index_rss = cached_feed(
+    LatestPostsFeed(), views.index_tags, views.index_etag
+)
+index_atom = cached_feed(
+    LatestPostsAtomFeed(), views.index_tags, views.index_etag
+)
+group_rss = cached_feed(
+    GroupPostsFeed(), views.group_tags, views.group_etag
+)
+group_atom = cached_feed(
+    GroupPostsAtomFeed(), views.group_tags, views.group_etag
+)
+profile_rss = cached_feed(
+    AuthorPostsFeed(), views.profile_tags, profile_feed_etag
+)
+profile_atom = cached_feed(
+    AuthorPostsAtomFeed(), views.profile_tags, profile_feed_etag
+)
@@ -0,0 +1,70 @@
+"""
+Кэш подписок пользователя.
+
+Множество id авторов, на которых подписан пользователь, хранится в кэше
+одной строкой байтов: отсортированные id записаны разностями соседних
+значений в формате varint, поэтому сотня подписок занимает около сотни
+байт. Сигналы Follow удаляют запись подписчика, и следующее чтение
+собирает её заново одним запросом к основной базе.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from .models import Follow
+
+KEY_PREFIX = 'follows'
+
+
+def _key(user_id):
+    return f'{KEY_PREFIX}:{user_id}'
+
+
+def encode(ids):
+    """Упаковать множество неотрицательных id в байты"""
+    data = bytearray()
+    previous = 0
+    for value in sorted(ids):
+        delta = value - previous
+        previous = value
+        while delta >= 0x80:
+            data.append(delta & 0x7F | 0x80)
+            delta >>= 7
+        data.append(delta)
+    return bytes(data)
+
+
+def decode(data):
+    """Распаковать байты encode() обратно в множество id"""
+    ids = set()
+    value = shift = previous = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        previous += value
+        ids.add(previous)
+        value = shift = 0
+    return frozenset(ids)
+
+
+def followed_ids(user):
+    """Множество id авторов, на которых подписан пользователь"""
+    if not user.is_authenticated:
+        return frozenset()
+    key = _key(user.pk)
+    data = cache.get(key)
+    if data is None:
+        # Из основной базы: отставшая реплика закэшировала бы старые подписки
+        data = encode(
+            Follow.objects.using(DEFAULT_DB_ALIAS).filter(
+                user_id=user.pk
+            ).values_list('author_id', flat=True)
+        )
+        cache.set(key, data, settings.FOLLOW_CACHE_TIMEOUT)
+    return decode(data)
+
+
+def invalidate(user_id):
+    cache.delete(_key(user_id))
@@ -0,0 +1,124 @@
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.db.sqlite import is_locked
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from posts import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузить базу параллельными писателями (комментарии) '
+        'и читателями (ленты и страница поста) и записать отчёт в JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument(
+            '--duration', type=float, default=10,
+            help='Длительность нагрузки в секундах',
+        )
+        parser.add_argument(
+            '--output', default='concurrency.json',
+            help='Файл для JSON-отчёта',
+        )
+
+    def run_client(self, role, sample, deadline):
+        client = Client()
+        client.force_login(sample.reader)
+        if role == 'writer':
+            requests = [(
+                'post',
+                reverse('posts:add_comment', args=[sample.post.pk]),
+                {'text': 'Комментарий под нагрузкой'},
+            )]
+        else:
+            requests = [
+                ('get', reverse('posts:index'), None),
+                ('get', reverse('posts:post_detail', args=[sample.post.pk]),
+                 None),
+            ]
+        result = {'timings': [], 'errors': 0, 'locked': 0}
+        try:
+            index = 0
+            while time.monotonic() < deadline:
+                method, url, data = requests[index % len(requests)]
+                index += 1
+                started = time.perf_counter()
+                try:
+                    response = getattr(client, method)(url, data)
+                except Exception as error:
+                    result['errors'] += 1
+                    result['locked'] += int(is_locked(error))
+                    continue
+                if response.status_code >= 400:
+                    result['errors'] += 1
+                    continue
+                result['timings'].append(
+                    (time.perf_counter() - started) * 1000
+                )
+        finally:
+            connection.close()
+        return role, result
+
+    def summary(self, results, duration):
+        timings = [value for result in results for value in result['timings']]
+        summary = {
+            'threads': len(results),
+            'requests': len(timings),
+            'throughput_rps': round(len(timings) / duration, 1),
+            'errors': sum(result['errors'] for result in results),
+            'locked': sum(result['locked'] for result in results),
+        }
+        if timings:
+            summary.update({
+                'p50_ms': round(benchmarks.percentile(timings, 50), 3),
+                'p99_ms': round(benchmarks.percentile(timings, 99), 3),
+                'mean_ms': round(statistics.mean(timings), 3),
+            })
+        return summary
+
+    def handle(self, *args, **options):
+        sample = benchmarks.get_sample()
+        if sample is None:
+            raise CommandError(
+                'Нет данных: сначала выполните generate_load_data'
+            )
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+        roles = (
+            ['writer'] * options['writers'] + ['reader'] * options['readers']
+        )
+        deadline = time.monotonic() + options['duration']
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=len(roles)) as executor:
+            futures = [
+                executor.submit(self.run_client, role, sample, deadline)
+                for role in roles
+            ]
+            outcomes = [future.result() for future in futures]
+        duration = time.monotonic() - started
+
+        report = {
+            'created': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'journal_mode': journal_mode,
+            'duration_s': round(duration, 3),
+        }
+        for role in ('writer', 'reader'):
+            results = [result for name, result in outcomes if name == role]
+            report[f'{role}s'] = self.summary(results, duration)
+            self.stdout.write(f'{role}s: {report[f"{role}s"]}')
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+        self.stdout.write(
+            self.style.SUCCESS(f'Отчёт записан в {options["output"]}')
+        )
@@ -0,0 +1,116 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.db import parallel
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from posts import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнить пропускную способность страниц ленты, профиля и поста '
+        'с последовательными и параллельными запросами к базе '
+        '(core.db.parallel) под конкурентной нагрузкой'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--clients', type=int, default=8,
+            help='Число одновременных клиентов',
+        )
+        parser.add_argument(
+            '--workers', type=int,
+            default=settings.PARALLEL_QUERY_WORKERS or 4,
+            help='Размер пула для параллельного режима',
+        )
+        parser.add_argument(
+            '--duration', type=float, default=10,
+            help='Длительность нагрузки на каждый режим в секундах',
+        )
+        parser.add_argument(
+            '--output', default='parallel_queries.json',
+            help='Файл для JSON-отчёта',
+        )
+
+    def get_urls(self, sample):
+        return [
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[sample.group.slug]),
+            reverse('posts:profile', args=[sample.author.username]),
+            reverse('posts:post_detail', args=[sample.post.pk]),
+        ]
+
+    def run_client(self, sample, urls, deadline):
+        # Гостю страницы отдаёт кэш: нагрузку создаёт вошедший читатель
+        client = Client()
+        client.force_login(sample.reader)
+        timings, errors, index = [], 0, 0
+        try:
+            while time.monotonic() < deadline:
+                url = urls[index % len(urls)]
+                index += 1
+                started = time.perf_counter()
+                response = client.get(url)
+                if response.status_code >= 400:
+                    errors += 1
+                    continue
+                timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            connection.close()
+        return timings, errors
+
+    def run_mode(self, workers, sample, options):
+        with override_settings(PARALLEL_QUERY_WORKERS=workers):
+            parallel._get_executor.cache_clear()
+            urls = self.get_urls(sample)
+            deadline = time.monotonic() + options['duration']
+            started = time.monotonic()
+            with ThreadPoolExecutor(max_workers=options['clients']) as pool:
+                futures = [
+                    pool.submit(self.run_client, sample, urls, deadline)
+                    for _ in range(options['clients'])
+                ]
+                results = [future.result() for future in futures]
+            duration = time.monotonic() - started
+        parallel._get_executor.cache_clear()
+        timings = [value for result, _ in results for value in result]
+        return {
+            'workers': workers,
+            'requests': len(timings),
+            'throughput_rps': round(len(timings) / duration, 1),
+            'errors': sum(errors for _, errors in results),
+            'p50_ms': round(benchmarks.percentile(timings, 50) or 0, 3),
+            'p99_ms': round(benchmarks.percentile(timings, 99) or 0, 3),
+        }
+
+    def handle(self, *args, **options):
+        sample = benchmarks.get_sample()
+        if sample is None:
+            raise CommandError(
+                'Нет данных: сначала выполните generate_load_data'
+            )
+        report = {
+            'created': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'clients': options['clients'],
+        }
+        for mode, workers in (('serial', 0), ('parallel', options['workers'])):
+            report[mode] = self.run_mode(workers, sample, options)
+            self.stdout.write(f'{mode}: {report[mode]}')
+        if report['serial']['throughput_rps']:
+            report['speedup'] = round(
+                report['parallel']['throughput_rps']
+                / report['serial']['throughput_rps'],
+                2,
+            )
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+        self.stdout.write(
+            self.style.SUCCESS(f'Отчёт записан в {options["output"]}')
+        )
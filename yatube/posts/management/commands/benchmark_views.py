@@ -0,0 +1,114 @@
+import json
+import statistics
+import time
+
+from core.db.pool import pool_stats
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.version import get_version
+from posts import benchmarks
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Замерить задержку (p50/p95/p99) и число SQL-запросов для каждого '
+        'адреса posts/urls.py и записать отчёт в JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кэш перед каждым запросом',
+        )
+        parser.add_argument(
+            '--reconnect', action='store_true',
+            help=(
+                'Закрывать соединения с базой перед каждым запросом, '
+                'как при CONN_MAX_AGE = 0'
+            ),
+        )
+        parser.add_argument(
+            '--output', default='benchmark.json',
+            help='Файл для JSON-отчёта',
+        )
+
+    def handle(self, *args, **options):
+        sample = benchmarks.get_sample()
+        if sample is None:
+            raise CommandError(
+                'Нет данных: сначала выполните generate_load_data'
+            )
+        cases = benchmarks.url_cases(sample)
+        client = Client()
+        client.force_login(sample.reader)
+        for _ in range(options['warmup']):
+            for name, url in cases:
+                client.get(url)
+
+        timings = {name: [] for name, url in cases}
+        queries = {name: [] for name, url in cases}
+        statuses = {}
+        for _ in range(options['iterations']):
+            for name, url in cases:
+                if options['cold']:
+                    cache.clear()
+                if options['reconnect']:
+                    connections.close_all()
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    elapsed = time.perf_counter() - started
+                timings[name].append(elapsed * 1000)
+                queries[name].append(len(captured))
+                statuses[name] = response.status_code
+
+        report = {
+            'created': timezone.now().isoformat(),
+            'django': get_version(),
+            'database': connection.vendor,
+            'engine': connection.settings_dict['ENGINE'],
+            'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+            'reconnect': options['reconnect'],
+            'iterations': options['iterations'],
+            'cold_cache': options['cold'],
+            'dataset': {
+                'users': User.objects.count(),
+                'groups': Group.objects.count(),
+                'posts': Post.objects.count(),
+                'comments': Comment.objects.count(),
+                'follows': Follow.objects.count(),
+            },
+            'views': {},
+        }
+        for name, url in cases:
+            values = timings[name]
+            report['views'][name] = {
+                'url': url,
+                'status': statuses[name],
+                'p50_ms': round(benchmarks.percentile(values, 50), 3),
+                'p95_ms': round(benchmarks.percentile(values, 95), 3),
+                'p99_ms': round(benchmarks.percentile(values, 99), 3),
+                'mean_ms': round(statistics.mean(values), 3),
+                'queries': max(queries[name]),
+            }
+            self.stdout.write(
+                f'{name:<24} {report["views"][name]["p50_ms"]:>9.2f} ms '
+                f'p95 {report["views"][name]["p95_ms"]:>9.2f} ms '
+                f'queries {report["views"][name]["queries"]}'
+            )
+        report['db_pools'] = pool_stats()
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+        self.stdout.write(
+            self.style.SUCCESS(f'Отчёт записан в {options["output"]}')
+        )
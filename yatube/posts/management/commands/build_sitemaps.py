@@ -0,0 +1,45 @@
+import gzip
+import os
+
+from django.core.management.base import BaseCommand
+from posts import sitemaps
+
+
+class Command(BaseCommand):
+    help = (
+        'Записать карту сайта заранее: индекс и все части, сжатые gzip, '
+        'под теми же именами, что отдают view-функции'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Каталог для файлов карты')
+        parser.add_argument(
+            '--base-url',
+            required=True,
+            help='Адрес сайта для ссылок, например https://yatube.example',
+        )
+
+    def write(self, directory, path, chunks):
+        name = os.path.join(directory, os.path.basename(path) + '.gz')
+        with gzip.open(name, 'wt', encoding='utf-8') as output:
+            output.writelines(chunks)
+
+    def handle(self, *args, **options):
+        directory = options['directory']
+        base_url = options['base_url'].rstrip('/')
+        os.makedirs(directory, exist_ok=True)
+        written = 0
+        for name, section in sitemaps.SECTIONS.items():
+            for number, _ in section.chunks():
+                self.write(
+                    directory,
+                    sitemaps.chunk_path(name, number),
+                    sitemaps.render_chunk(section, number, base_url),
+                )
+                written += 1
+        self.write(
+            directory, 'sitemap.xml', [sitemaps.render_index(base_url)]
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'Записано частей карты сайта: {written}')
+        )
@@ -0,0 +1,42 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from posts import benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Показать план и время запросов страниц приложения posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--depth',
+            type=int,
+            default=1000,
+            help='Глубина ленты для проверки keyset-страницы',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Сколько раз выполнить каждый запрос для замера',
+        )
+
+    def handle(self, *args, **options):
+        sample = benchmarks.get_sample()
+        if sample is None:
+            raise CommandError(
+                'Нет данных: сначала заполните базу постами и подписками'
+            )
+        queries = benchmarks.view_queries(sample, depth=options['depth'])
+        for name, page, queryset in queries:
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{name} ({page}): '
+                f'median {statistics.median(timings):.2f} ms'
+            ))
+            self.stdout.write(queryset.explain())
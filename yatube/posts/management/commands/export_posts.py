@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгрузить пользователей, группы, посты, комментарии и подписки '
+        'в каталог: NDJSON и картинки постов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Каталог для выгрузки')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько строк читать из базы за раз',
+        )
+
+    def handle(self, *args, **options):
+        counts = transfer.export(
+            options['directory'], batch_size=options['batch_size']
+        )
+        summary = ', '.join(
+            f'{name} {count}' for name, count in counts.items()
+        )
+        self.stdout.write(self.style.SUCCESS(f'Выгружено: {summary}'))
@@ -0,0 +1,225 @@
+import io
+import itertools
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Case, When
+from django.utils import timezone
+from faker import Faker
+from PIL import Image
+from posts import feed_cache, search, stats, timeline
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сгенерировать воспроизводимый набор данных для нагрузочных '
+        'замеров: пользователи, группы, посты с картинками, комментарии '
+        'и граф подписок со степенным распределением'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=200000)
+        parser.add_argument(
+            '--follows', type=int, default=50,
+            help='Среднее число подписок на пользователя',
+        )
+        parser.add_argument(
+            '--images', type=int, default=20,
+            help='Сколько разных картинок сгенерировать для постов',
+        )
+        parser.add_argument(
+            '--image-ratio', type=float, default=0.3,
+            help='Доля постов с картинкой',
+        )
+        parser.add_argument(
+            '--zipf', type=float, default=1.2,
+            help='Показатель степенного распределения популярности авторов',
+        )
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.fake = Faker('ru_RU')
+        self.fake.seed_instance(options['seed'])
+        self.batch_size = options['batch_size']
+        # Имена зависят только от seed: повторный запуск с тем же seed
+        # требует чистой базы
+        self.prefix = f'load{options["seed"]}'
+
+        user_ids = self.create_users(options['users'])
+        group_ids = self.create_groups(options['groups'])
+        images = self.create_images(options['images'])
+        post_ids = self.create_posts(
+            options['posts'], user_ids, group_ids, images,
+            options['image_ratio'], options['days'],
+        )
+        self.create_comments(options['comments'], user_ids, post_ids)
+        follows = self.create_follows(
+            user_ids, options['follows'], options['zipf']
+        )
+
+        stats.recount(batch_size=self.batch_size)
+        # bulk_create не вызывает сигналы, которые индексируют посты
+        search.rebuild(batch_size=self.batch_size)
+        if timeline.is_enabled():
+            for user_id in user_ids:
+                timeline.rebuild(user_id)
+        feed_cache.bump(feed_cache.INDEX, feed_cache.GROUPS)
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано: пользователей {len(user_ids)}, групп {len(group_ids)}, '
+            f'постов {len(post_ids)}, комментариев {options["comments"]}, '
+            f'подписок {follows}'
+        ))
+
+    def _bulk_create(self, model, objects):
+        """Сохранить объекты пачками и вернуть их id"""
+        ids = []
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) == self.batch_size:
+                ids.extend(self._flush(model, batch))
+                batch = []
+        if batch:
+            ids.extend(self._flush(model, batch))
+        return ids
+
+    def _flush(self, model, batch):
+        with transaction.atomic():
+            created = model.objects.bulk_create(batch)
+        if created and created[0].pk is not None:
+            return [obj.pk for obj in created]
+        # Бэкенд не вернул id: берём последние созданные строки
+        return list(
+            model.objects.order_by('-pk').values_list('pk', flat=True)[
+                :len(batch)
+            ]
+        )[::-1]
+
+    def create_users(self, count):
+        password = make_password(None)
+        return self._bulk_create(User, (
+            User(
+                username=f'{self.prefix}-{i}',
+                first_name=self.fake.first_name(),
+                last_name=self.fake.last_name(),
+                email=self.fake.email(),
+                password=password,
+            )
+            for i in range(count)
+        ))
+
+    def create_groups(self, count):
+        return self._bulk_create(Group, (
+            Group(
+                title=self.fake.sentence(nb_words=3)[:200],
+                slug=f'{self.prefix}-{i}',
+                description=self.fake.paragraph(),
+            )
+            for i in range(count)
+        ))
+
+    def create_images(self, count):
+        names = []
+        for i in range(count):
+            color = tuple(self.random.randrange(256) for _ in range(3))
+            buffer = io.BytesIO()
+            Image.new('RGB', (1200, 800), color).save(buffer, 'JPEG')
+            names.append(default_storage.save(
+                f'posts/{self.prefix}-{i}.jpg', ContentFile(buffer.getvalue())
+            ))
+        return names
+
+    def create_posts(self, count, user_ids, group_ids, images,
+                     image_ratio, days):
+        def posts():
+            for _ in range(count):
+                image = None
+                if images and self.random.random() < image_ratio:
+                    image = self.random.choice(images)
+                group_id = None
+                if group_ids and self.random.random() < 0.7:
+                    group_id = self.random.choice(group_ids)
+                yield Post(
+                    author_id=self.random.choice(user_ids),
+                    group_id=group_id,
+                    text=self.fake.text(max_nb_chars=400),
+                    image=image,
+                )
+
+        post_ids = self._bulk_create(Post, posts())
+        # auto_now_add проставляет всем постам текущее время:
+        # раскладываем даты публикации по последним days дням
+        now = timezone.now()
+        span = days * 24 * 60 * 60
+        # CASE по 300 строк укладывается в лимит параметров SQLite
+        for start in range(0, len(post_ids), 300):
+            chunk = post_ids[start:start + 300]
+            Post.objects.filter(pk__in=chunk).update(pub_date=Case(*(
+                When(pk=pk, then=now - timedelta(
+                    seconds=self.random.randrange(span)
+                ))
+                for pk in chunk
+            )))
+        return post_ids
+
+    def create_comments(self, count, user_ids, post_ids):
+        if not post_ids:
+            return
+        self._bulk_create(Comment, (
+            Comment(
+                post_id=self.random.choice(post_ids),
+                author_id=self.random.choice(user_ids),
+                text=self.fake.sentence(),
+            )
+            for _ in range(count)
+        ))
+
+    def create_follows(self, user_ids, follows, zipf):
+        """Граф подписок: популярность автора убывает как 1 / rank ** zipf"""
+        authors = list(user_ids)
+        self.random.shuffle(authors)
+        cum_weights = list(itertools.accumulate(
+            1 / (rank ** zipf) for rank in range(1, len(authors) + 1)
+        ))
+        created = 0
+        batch = []
+        for user_id in user_ids:
+            wanted = min(
+                len(authors) - 1,
+                int(self.random.expovariate(1 / follows)) if follows else 0,
+            )
+            chosen = set()
+            for author_id in self.random.choices(
+                authors, cum_weights=cum_weights, k=wanted * 2
+            ):
+                if author_id != user_id:
+                    chosen.add(author_id)
+                if len(chosen) >= wanted:
+                    break
+            batch.extend(
+                Follow(user_id=user_id, author_id=author_id)
+                for author_id in chosen
+            )
+            if len(batch) >= self.batch_size:
+                Follow.objects.bulk_create(batch, ignore_conflicts=True)
+                created += len(batch)
+                batch = []
+        if batch:
+            Follow.objects.bulk_create(batch, ignore_conflicts=True)
+            created += len(batch)
+        return created
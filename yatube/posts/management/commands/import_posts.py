@@ -0,0 +1,31 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = 'Загрузить каталог, созданный export_posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Каталог с выгрузкой')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Размер пачки для массовой записи',
+        )
+
+    def handle(self, *args, **options):
+        directory = options['directory']
+        if not os.path.exists(os.path.join(directory, transfer.DATA_FILE)):
+            raise CommandError(
+                f'В каталоге {directory} нет {transfer.DATA_FILE}'
+            )
+        counts = transfer.Importer(
+            directory, batch_size=options['batch_size']
+        ).run()
+        summary = ', '.join(
+            f'{name} {count}' for name, count in counts.items()
+        )
+        self.stdout.write(self.style.SUCCESS(f'Загружено: {summary}'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Построить поисковый индекс постов заново'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Размер пачки для массовой записи',
+        )
+
+    def handle(self, *args, **options):
+        total = search.rebuild(batch_size=options['batch_size'])
+        backend = 'FTS5' if search.fts_enabled() else 'SearchTerm'
+        self.stdout.write(
+            self.style.SUCCESS(f'Проиндексировано постов: {total} ({backend})')
+        )
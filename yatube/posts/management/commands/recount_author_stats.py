@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from posts import stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитать счётчики постов, подписок и комментариев авторов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Размер пачки для массовой записи',
+        )
+
+    def handle(self, *args, **options):
+        repaired = stats.recount(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Исправлено строк: {repaired}')
+        )
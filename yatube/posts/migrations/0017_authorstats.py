@@ -0,0 +1,60 @@
+# Generated by Django 2.2.28 on 2026-10-18 03:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_author_stats(apps, schema_editor):
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    Comment = apps.get_model('posts', 'Comment')
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    stats = {}
+    sources = (
+        ('posts_count', Post, 'author_id'),
+        ('followers_count', Follow, 'author_id'),
+        ('following_count', Follow, 'user_id'),
+        ('comments_count', Comment, 'author_id'),
+    )
+    for field, model, key in sources:
+        rows = model.objects.order_by().values(key).annotate(
+            total=models.Count('id')
+        ).values_list(key, 'total')
+        for user_id, total in rows:
+            stats.setdefault(user_id, {})[field] = total
+    AuthorStats.objects.bulk_create(
+        [
+            AuthorStats(author_id=user_id, **values)
+            for user_id, values in stats.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0016_auto_20261018_0321'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+                ('followers_count', models.PositiveIntegerField(default=0, verbose_name='Подписчиков')),
+                ('following_count', models.PositiveIntegerField(default=0, verbose_name='Подписок')),
+                ('comments_count', models.PositiveIntegerField(default=0, verbose_name='Комментариев')),
+            ],
+            options={
+                'verbose_name': 'Статистика автора',
+                'verbose_name_plural': 'Статистика авторов',
+            },
+        ),
+        migrations.RunPython(
+            fill_author_stats, migrations.RunPython.noop
+        ),
+    ]
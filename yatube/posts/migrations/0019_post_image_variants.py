@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-18 03:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_auto_20261018_0325'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_variants',
+            field=models.TextField(blank=True, default='', editable=False, help_text='JSON со списком готовых размеров и форматов картинки', verbose_name='Размеры картинки'),
+        ),
+    ]
@@ -1,3 +1,5 @@
+import json
+
 from django.contrib.auth import get_user_model
 from django.db import models
 
@@ -19,6 +21,31 @@ class Group(models.Model):
         verbose_name_plural = 'Группы'
 
 
+# Колонки поста, которые выводит шаблон post_list.html
+FEED_FIELDS = (
+    'text',
+    'pub_date',
+    'image',
+    'image_variants',
+    'author__username',
+    'author__first_name',
+    'author__last_name',
+    'group__title',
+    'group__slug',
+)
+
+
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """
+        Посты для лент: автор и группа одним запросом, без колонок,
+        которые шаблон post_list.html не выводит.
+        """
+        return self.select_related('author', 'group').only(
+            *FEED_FIELDS
+        ).order_by('-pub_date', '-id')
+
+
 class Post(models.Model):
     """Модель для публикаций"""
     text = models.TextField(
@@ -53,9 +80,32 @@ class Post(models.Model):
         null=True,
         help_text='Выберите картинку для поста'
     )
+    image_variants = models.TextField(
+        'Размеры картинки',
+        blank=True,
+        default='',
+        editable=False,
+        help_text='JSON со списком готовых размеров и форматов картинки'
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx',
+            ),
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_pub_date_idx',
+            ),
+        ]
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
@@ -63,6 +113,12 @@ class Post(models.Model):
         """Вернуть первые 15 символов"""
         return self.text[:15]
 
+    def get_image_variants(self):
+        """Готовые размеры картинки: name, width, height, format, bytes"""
+        if not self.image_variants:
+            return []
+        return json.loads(self.image_variants)
+
 
 class Comment(models.Model):
     """Модель для комментариев"""
@@ -91,6 +147,12 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('created',)
+        indexes = [
+            models.Index(
+                fields=['post', 'created'],
+                name='comment_post_created_idx',
+            ),
+        ]
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
 
@@ -121,5 +183,94 @@ class Follow(models.Model):
                 name='unique_follow',
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['author', 'user'],
+                name='follow_author_user_idx',
+            ),
+        ]
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
+
+
+class TimelineEntry(models.Model):
+    """Модель для записей материализованной ленты подписок"""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        ordering = ('-pub_date',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_entry',
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_pub_date_idx',
+            )
+        ]
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+
+
+class AuthorStats(models.Model):
+    """Модель для счётчиков автора, обновляемых сигналами"""
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Автор',
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+    comments_count = models.PositiveIntegerField('Комментариев', default=0)
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self):
+        """Вернуть имя автора"""
+        return f'{self.author}'
+
+
+class SearchTerm(models.Model):
+    """Модель для обратного индекса поиска на базах без FTS5"""
+    term = models.CharField('Слово', max_length=100)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='search_terms',
+        verbose_name='Пост',
+    )
+    frequency = models.PositiveIntegerField('Число вхождений', default=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['term', 'post'],
+                name='unique_search_term',
+            )
+        ]
+        verbose_name = 'Слово поиска'
+        verbose_name_plural = 'Слова поиска'
+
+    def __str__(self):
+        """Вернуть слово"""
+        return self.term
@@ -0,0 +1,90 @@
+"""
+Кэш целых страниц для гостей.
+
+Ответ хранится по полному адресу запроса вместе с тегами страницы
+и их поколениями из feed_cache на момент отрисовки. При чтении
+поколения сравниваются с текущими: сигналы Post, Comment, Group
+и Follow увеличивают их, и устаревшая страница перерисовывается.
+Попадание в кэш не трогает ни базу, ни шаблоны.
+
+Запросы с cookie сессии (авторизованные пользователи) идут мимо кэша.
+Пока реплики могут не догнать сброс тегов страницы, она отрисовывается
+из основной базы: иначе устаревшая копия сохранилась бы в кэше и ETag
+под новым поколением.
+"""
+import hashlib
+from functools import wraps
+
+from core.db.routers import pin_to_primary
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+
+from . import feed_cache
+
+KEY_PREFIX = 'page'
+
+
+def _key(request):
+    url = request.build_absolute_uri()
+    return f'{KEY_PREFIX}:{hashlib.md5(url.encode()).hexdigest()}'
+
+
+def _is_anonymous(request):
+    return (
+        request.method in ('GET', 'HEAD')
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+    )
+
+
+def _is_cacheable(response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and 'private' not in response.get('Cache-Control', '')
+    )
+
+
+def _render(view, request, tags, args, kwargs):
+    if feed_cache.changed_recently(*tags):
+        with pin_to_primary():
+            return view(request, *args, **kwargs)
+    return view(request, *args, **kwargs)
+
+
+def cache_anonymous(tags_func):
+    """
+    Кэшировать страницу для гостей. tags_func(request, *args, **kwargs)
+    возвращает теги feed_cache, от которых зависит страница.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not _is_anonymous(request):
+                tags = tags_func(request, *args, **kwargs)
+                return _render(view, request, tags, args, kwargs)
+            key = _key(request)
+            entry = cache.get(key)
+            if entry is not None:
+                tags, generations, response = entry
+                if feed_cache.get_generations(*tags) == generations:
+                    response['X-Page-Cache'] = 'hit'
+                    return get_conditional_response(
+                        request, etag=response.get('ETag'), response=response
+                    )
+            tags = tags_func(request, *args, **kwargs)
+            # Поколения читаются до отрисовки: изменение во время неё
+            # сделает сохранённую страницу устаревшей
+            generations = feed_cache.get_generations(*tags)
+            response = _render(view, request, tags, args, kwargs)
+            if _is_cacheable(response):
+                cache.set(
+                    key,
+                    (tags, generations, response),
+                    settings.PAGE_CACHE_TIMEOUT,
+                )
+                response['X-Page-Cache'] = 'miss'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,157 @@
+import base64
+import binascii
+import datetime
+import json
+from types import MethodType
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+
+# Ключи курсора сравниваются в SQL: числа вне BIGINT база не примет
+INT_MIN, INT_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+class InvalidCursor(ValueError):
+    """Курсор повреждён или не соответствует порядку сортировки"""
+
+
+def _isoformat(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def _has_next(page):
+    return page.next_cursor is not None
+
+
+def _has_previous(page):
+    return page.previous_cursor is not None
+
+
+class CursorPaginator(Paginator):
+    """
+    Keyset-пагинатор: страница выбирается условием по полям сортировки
+    (по умолчанию pub_date и id), поэтому не нужны ни COUNT(*), ни OFFSET,
+    и стоимость страницы не зависит от её глубины.
+
+    Страница остаётся обычным Page, но навигация по ней строится
+    по атрибутам next_cursor, previous_cursor и last_cursor, а её
+    has_next() и has_previous() смотрят на курсоры. Номера страниц
+    и num_pages требуют подсчёта строк и не используются.
+    """
+
+    def __init__(self, object_list, per_page,
+                 ordering=('-pub_date', '-id')):
+        super().__init__(object_list, per_page)
+        self.ordering = tuple(ordering)
+
+    @property
+    def fields(self):
+        return [field.lstrip('-') for field in self.ordering]
+
+    def encode_cursor(self, position, reverse=False):
+        payload = json.dumps([int(reverse), position], default=_isoformat)
+        return base64.urlsafe_b64encode(
+            payload.encode()
+        ).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padding = '=' * (-len(cursor) % 4)
+            reverse, position = json.loads(
+                base64.urlsafe_b64decode(cursor + padding).decode()
+            )
+        except (TypeError, ValueError, binascii.Error):
+            raise InvalidCursor(cursor)
+        if position is None:
+            return None, bool(reverse)
+        if not isinstance(position, list) or (
+            len(position) != len(self.ordering)
+        ):
+            raise InvalidCursor(cursor)
+        try:
+            position = [
+                self._get_field(name).to_python(value)
+                for name, value in zip(self.fields, position)
+            ]
+        except Exception:
+            raise InvalidCursor(cursor)
+        if None in position or any(
+            isinstance(value, int) and not INT_MIN <= value <= INT_MAX
+            for value in position
+        ):
+            raise InvalidCursor(cursor)
+        return position, bool(reverse)
+
+    def get_page(self, cursor):
+        """
+        Вернуть страницу по курсору. Пустой или неверный курсор
+        отдаёт первую страницу.
+        """
+        position, reverse = None, False
+        if cursor:
+            try:
+                position, reverse = self.decode_cursor(cursor)
+            except InvalidCursor:
+                pass
+        return self.page(position, reverse)
+
+    def page_queryset(self, position=None, reverse=False):
+        """Запрос страницы: на одну строку больше, чтобы узнать о следующей"""
+        queryset = self.object_list
+        if position is not None:
+            queryset = queryset.filter(self._after(position, reverse))
+        ordering = self.ordering
+        if reverse:
+            ordering = [self._invert(field) for field in ordering]
+        return queryset.order_by(*ordering)[:self.per_page + 1]
+
+    def page(self, position=None, reverse=False):
+        rows = list(self.page_queryset(position, reverse))
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse:
+            rows.reverse()
+        page = self._get_page(rows, None, self)
+        page.next_cursor = page.previous_cursor = None
+        # Page считает соседей по номеру и COUNT(*), курсорная — по курсорам
+        page.has_next = MethodType(_has_next, page)
+        page.has_previous = MethodType(_has_previous, page)
+        page.last_cursor = self.encode_cursor(None, reverse=True)
+        if not rows:
+            return page
+        has_next = has_more if not reverse else position is not None
+        has_previous = has_more if reverse else position is not None
+        if has_next:
+            page.next_cursor = self.encode_cursor(self._position(rows[-1]))
+        if has_previous:
+            page.previous_cursor = self.encode_cursor(
+                self._position(rows[0]), reverse=True
+            )
+        return page
+
+    def _get_field(self, name):
+        """Поле модели или аннотации запроса, например rank поиска"""
+        annotations = self.object_list.query.annotations
+        if name in annotations:
+            return annotations[name].output_field
+        return self.object_list.model._meta.get_field(name)
+
+    def _position(self, obj):
+        return [getattr(obj, name) for name in self.fields]
+
+    def _invert(self, field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def _after(self, position, reverse):
+        """Условие «строго после позиции» в заданном направлении"""
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') != reverse else 'gt'
+            clause = Q(**{f'{name}__{lookup}': position[index]})
+            for prev_name, value in zip(self.fields[:index], position):
+                clause &= Q(**{prev_name: value})
+            condition |= clause
+        return condition
@@ -0,0 +1,178 @@
+"""
+Полнотекстовый поиск по тексту постов и названиям групп.
+
+На SQLite с FTS5 текст поста и название группы хранятся в виртуальной
+таблице posts_post_fts, а релевантность считает bm25(). На остальных
+базах используется обратный индекс SearchTerm: слово, пост и число
+вхождений. Оба индекса обновляются сигналами, а команда
+rebuild_search_index строит их заново.
+
+Чем меньше rank, тем выше пост в выдаче, поэтому результаты
+сортируются по ORDERING и листаются CursorPaginator.
+"""
+import re
+from collections import Counter
+from functools import lru_cache
+
+from django.db import connection, transaction
+from django.db.models import (Count, F, FloatField, OuterRef, Subquery, Sum,
+                              Value)
+from django.db.models.expressions import RawSQL
+
+from .models import Group, Post, SearchTerm
+
+FTS_TABLE = 'posts_post_fts'
+ORDERING = ('rank', '-id')
+TERM_MAX_LENGTH = SearchTerm._meta.get_field('term').max_length
+
+_WORD = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """Слова текста в нижнем регистре"""
+    return [
+        word[:TERM_MAX_LENGTH] for word in _WORD.findall(text.casefold())
+    ]
+
+
+@lru_cache(maxsize=None)
+def _sqlite_has_fts5():
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return ('ENABLE_FTS5',) in cursor.fetchall()
+
+
+def fts_enabled():
+    """Используется ли FTS5 (иначе обратный индекс SearchTerm)"""
+    return connection.vendor == 'sqlite' and _sqlite_has_fts5()
+
+
+def _group_title(post):
+    return post.group.title if post.group_id else ''
+
+
+def _terms(post, group_title):
+    # str(): текст поста может быть ещё не приведён к строке полем модели
+    counts = Counter(tokenize(str(post.text)) + tokenize(group_title))
+    return [
+        SearchTerm(post_id=post.pk, term=term, frequency=frequency)
+        for term, frequency in counts.items()
+    ]
+
+
+def index_post(post, group_title=None):
+    """Добавить пост в индекс или обновить его запись"""
+    if group_title is None:
+        group_title = _group_title(post)
+    if fts_enabled():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT OR REPLACE INTO {FTS_TABLE} '
+                '(rowid, text, group_title) VALUES (%s, %s, %s)',
+                [post.pk, str(post.text), group_title],
+            )
+        return
+    with transaction.atomic():
+        SearchTerm.objects.filter(post_id=post.pk).delete()
+        SearchTerm.objects.bulk_create(_terms(post, group_title))
+
+
+def unindex_post(post_id):
+    """Убрать пост из индекса"""
+    if fts_enabled():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id]
+            )
+    # Строки SearchTerm удаляются каскадно вместе с постом
+
+
+def index_group(group_id, title):
+    """Обновить название группы у всех её постов"""
+    posts = Post.objects.filter(group_id=group_id)
+    if fts_enabled():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {FTS_TABLE} SET group_title = %s WHERE rowid IN '
+                f'(SELECT id FROM {Post._meta.db_table} WHERE group_id = %s)',
+                [title, group_id],
+            )
+        return
+    for post in posts.only('text').iterator():
+        index_post(post, title)
+
+
+def rebuild(batch_size=1000):
+    """Построить индекс заново, вернуть число проиндексированных постов"""
+    if fts_enabled():
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, text, group_title) '
+                "SELECT p.id, p.text, COALESCE(g.title, '') "
+                f'FROM {Post._meta.db_table} p '
+                f'LEFT JOIN {Group._meta.db_table} g ON g.id = p.group_id'
+            )
+        return Post.objects.count()
+    posts = Post.objects.select_related('group').only('text', 'group__title')
+    total = 0
+    batch = []
+    with transaction.atomic():
+        SearchTerm.objects.all().delete()
+        for post in posts.iterator(chunk_size=batch_size):
+            total += 1
+            batch.extend(_terms(post, _group_title(post)))
+            if len(batch) >= batch_size:
+                SearchTerm.objects.bulk_create(batch)
+                batch = []
+        SearchTerm.objects.bulk_create(batch)
+    return total
+
+
+def _fts_search(queryset, words):
+    match = ' '.join(f'"{word}"' for word in words)
+    table = queryset.model._meta.db_table
+    # RawSQL в id__in SQLite прочитал бы как скалярный подзапрос
+    return queryset.extra(
+        where=[
+            f'{table}.id IN '
+            f'(SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)'
+        ],
+        params=[match],
+    ).annotate(
+        rank=RawSQL(
+            f'SELECT bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id',
+            [match],
+            output_field=FloatField(),
+        )
+    )
+
+
+def _term_search(queryset, words):
+    matching = SearchTerm.objects.filter(term__in=words).values(
+        'post'
+    ).annotate(found=Count('term')).filter(found=len(words)).values('post')
+    score = SearchTerm.objects.filter(
+        post=OuterRef('pk'), term__in=words
+    ).values('post').annotate(
+        score=Sum(F('frequency') * -1)
+    ).values('score')
+    return queryset.filter(id__in=matching).annotate(
+        rank=Subquery(score, output_field=FloatField())
+    )
+
+
+def search_posts(queryset, query):
+    """
+    Посты из queryset, содержащие все слова запроса, с аннотацией rank.
+    Пустой запрос ничего не находит.
+    """
+    words = list(dict.fromkeys(tokenize(query)))
+    if not words:
+        return queryset.none().annotate(
+            rank=Value(0, output_field=FloatField())
+        )
+    if fts_enabled():
+        return _fts_search(queryset, words)
+    return _term_search(queryset, words)
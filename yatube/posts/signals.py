@@ -0,0 +1,135 @@
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from . import feed_cache, follow_cache, search, stats, timeline
+from .models import Comment, Follow, Group, Post
+
+
+@receiver(pre_save, sender=Post)
+def invalidate_previous_group(sender, instance, **kwargs):
+    """Сбросить кэш группы, из которой пост переносят в другую"""
+    if instance.pk is None:
+        return
+    group_id = Post.objects.filter(pk=instance.pk).values_list(
+        'group_id', flat=True
+    ).first()
+    if group_id and group_id != instance.group_id:
+        feed_cache.bump(feed_cache.group_tag(group_id))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, **kwargs):
+    """Сбросить кэш лент, в которых показывается пост"""
+    feed_cache.bump(*feed_cache.post_tags(instance))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_feeds(sender, instance, **kwargs):
+    """Сбросить кэш лент, в которых показывается название группы"""
+    feed_cache.bump(feed_cache.GROUPS, feed_cache.group_tag(instance.pk))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_post_page(sender, instance, **kwargs):
+    """Сбросить ETag страницы поста, на которой выводятся комментарии"""
+    feed_cache.bump(feed_cache.post_tag(instance.post_id))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follower_pages(sender, instance, **kwargs):
+    """Сбросить ETag страниц с кнопкой подписки для подписчика"""
+    feed_cache.bump(feed_cache.follower_tag(instance.user_id))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_followed_ids(sender, instance, **kwargs):
+    """Сбросить кэшированное множество подписок подписчика"""
+    follow_cache.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Post)
+def count_post(sender, instance, created, **kwargs):
+    if created:
+        stats.increment(instance.author_id, 'posts_count')
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post(sender, instance, **kwargs):
+    stats.increment(instance.author_id, 'posts_count', -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    if created:
+        stats.increment(instance.author_id, 'comments_count')
+        stats.reset_comments_count(instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    stats.increment(instance.author_id, 'comments_count', -1)
+    stats.reset_comments_count(instance.post_id)
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, **kwargs):
+    if created:
+        stats.increment(instance.author_id, 'followers_count')
+        stats.increment(instance.user_id, 'following_count')
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance, **kwargs):
+    stats.increment(instance.author_id, 'followers_count', -1)
+    stats.increment(instance.user_id, 'following_count', -1)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, **kwargs):
+    """Разложить новый пост по лентам подписчиков"""
+    if created and timeline.is_enabled():
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    """Заполнить ленту постами автора после подписки"""
+    if created and timeline.is_enabled():
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def purge_timeline(sender, instance, **kwargs):
+    """Очистить ленту от постов автора после отписки"""
+    if timeline.is_enabled():
+        timeline.purge(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    """Обновить пост в поисковом индексе"""
+    search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.unindex_post(instance.pk)
+
+
+@receiver(post_save, sender=Group)
+def index_group(sender, instance, created, **kwargs):
+    """Обновить название группы в поисковом индексе её постов"""
+    if not created:
+        search.index_group(instance.pk, instance.title)
+
+
+@receiver(pre_delete, sender=Group)
+def unindex_group(sender, instance, **kwargs):
+    # После удаления группы у постов уже не найти её id
+    search.index_group(instance.pk, '')
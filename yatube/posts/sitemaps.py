@@ -0,0 +1,157 @@
+"""
+Карта сайта для миллионов постов.
+
+Каждый раздел (посты, группы, профили) делится на части по диапазонам
+первичного ключа: часть n содержит объекты с pk в [n * size, (n + 1) *
+size). Поэтому часть читается одним диапазоном по индексу pk без OFFSET,
+а в ней не бывает больше SITEMAP_CHUNK_SIZE адресов. Индекс карты
+строится одним запросом с GROUP BY по номеру части, lastmod части
+и адреса — самая поздняя дата публикации поста.
+
+Части отдаются потоком StreamingHttpResponse. Команда build_sitemaps
+записывает те же файлы заранее, сжатыми gzip.
+"""
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F, Max
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.views.decorators.http import require_safe
+
+from . import feed_cache, page_cache
+from .models import Group, Post
+
+User = get_user_model()
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+CONTENT_TYPE = 'application/xml; charset=utf-8'
+
+
+class Section:
+    """Раздел карты: адреса объектов queryset и даты их изменения"""
+
+    def __init__(self, name, queryset, lastmod, key, url_name):
+        self.name = name
+        self.queryset = queryset
+        self.lastmod = lastmod
+        self.key = key
+        self.url_name = url_name
+
+    @property
+    def size(self):
+        return settings.SITEMAP_CHUNK_SIZE
+
+    @property
+    def related(self):
+        """lastmod берётся из связанных постов и требует агрегации"""
+        return '__' in self.lastmod
+
+    def chunks(self):
+        """Номера непустых частей и их lastmod"""
+        return self.queryset.annotate(
+            chunk=F('pk') / self.size
+        ).values('chunk').annotate(
+            last=Max(self.lastmod)
+        ).order_by('chunk').values_list('chunk', 'last')
+
+    def chunk(self, number):
+        """Объекты части: pk в [number * size, (number + 1) * size)"""
+        return self.queryset.filter(
+            pk__gte=number * self.size, pk__lt=(number + 1) * self.size
+        )
+
+    def entries(self, number):
+        """Ключи адресов части и их lastmod, по возрастанию pk"""
+        rows = self.chunk(number).order_by('pk')
+        if self.related:
+            rows = rows.annotate(last=Max(self.lastmod))
+            return rows.values_list(self.key, 'last')
+        return rows.values_list(self.key, self.lastmod)
+
+    def location(self, key):
+        return reverse(self.url_name, args=[key])
+
+
+SECTIONS = {
+    section.name: section
+    for section in (
+        Section('posts', Post.objects.all(), 'pub_date', 'pk',
+                'posts:post_detail'),
+        Section('groups', Group.objects.all(), 'posts__pub_date', 'slug',
+                'posts:group_list'),
+        Section('profiles', User.objects.filter(posts__isnull=False),
+                'posts__pub_date', 'username', 'posts:profile'),
+    )
+}
+
+
+def _lastmod(value):
+    if value is None:
+        return ''
+    return f'<lastmod>{value.date().isoformat()}</lastmod>'
+
+
+def chunk_path(name, number):
+    return reverse('posts:sitemap_section', args=[name, number])
+
+
+def render_index(base_url):
+    """XML индекса карты: по элементу на каждую непустую часть"""
+    parts = [XML_HEADER, f'<sitemapindex xmlns="{XMLNS}">\n']
+    for name, section in SECTIONS.items():
+        for number, last in section.chunks():
+            location = escape(base_url + chunk_path(name, number))
+            parts.append(
+                f'<sitemap><loc>{location}</loc>{_lastmod(last)}</sitemap>\n'
+            )
+    parts.append('</sitemapindex>\n')
+    return ''.join(parts)
+
+
+def render_chunk(section, number, base_url):
+    """XML части карты строками, по мере чтения из базы"""
+    yield XML_HEADER
+    yield f'<urlset xmlns="{XMLNS}">\n'
+    rows = section.entries(number).iterator(
+        chunk_size=settings.SITEMAP_BATCH_SIZE
+    )
+    for key, last in rows:
+        location = escape(base_url + section.location(key))
+        yield f'<url><loc>{location}</loc>{_lastmod(last)}</url>\n'
+    yield '</urlset>\n'
+
+
+def _base_url(request):
+    return f'{request.scheme}://{request.get_host()}'
+
+
+def index_tags(request):
+    return [feed_cache.INDEX, feed_cache.GROUPS]
+
+
+@require_safe
+@page_cache.cache_anonymous(index_tags)
+def sitemap_index(request):
+    return HttpResponse(
+        render_index(_base_url(request)), content_type=CONTENT_TYPE
+    )
+
+
+@require_safe
+def sitemap_section(request, section, number):
+    if section not in SECTIONS:
+        raise Http404('Нет такого раздела карты сайта')
+    section = SECTIONS[section]
+    # Пустой раздел отдаёт пустую нулевую часть, остальные пустые части
+    # индекс не перечисляет
+    if not section.chunk(number).exists() and (
+        number or section.queryset.exists()
+    ):
+        raise Http404('Нет такой части карты сайта')
+    return StreamingHttpResponse(
+        render_chunk(section, number, _base_url(request)),
+        content_type=CONTENT_TYPE,
+    )
@@ -0,0 +1,111 @@
+"""
+Денормализованные счётчики авторов и постов.
+
+Счётчики в AuthorStats меняются атомарными F()-обновлениями из сигналов,
+поэтому страницы профиля и поста, а также админка подписок не считают
+строки на каждый запрос. recount() пересчитывает их с нуля и используется
+командой recount_author_stats для починки расхождений.
+
+Число комментариев поста хранится в кэше и сбрасывается сигналами
+при добавлении и удалении комментариев.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import AuthorStats, Comment, Follow, Post
+
+User = get_user_model()
+
+FIELDS = (
+    'posts_count',
+    'followers_count',
+    'following_count',
+    'comments_count',
+)
+
+
+def stats_for(user):
+    """Вернуть счётчики пользователя, не создавая пустую строку"""
+    try:
+        return user.stats
+    except AuthorStats.DoesNotExist:
+        return AuthorStats(author=user)
+
+
+def _comments_count_key(post_id):
+    return f'post-comments-count:{post_id}'
+
+
+def comments_count(post_id):
+    """Число комментариев поста из кэша"""
+    return cache.get_or_set(
+        _comments_count_key(post_id),
+        lambda: Comment.objects.filter(post_id=post_id).count(),
+        timeout=settings.COUNTER_CACHE_TIMEOUT,
+    )
+
+
+def reset_comments_count(post_id):
+    cache.delete(_comments_count_key(post_id))
+
+
+def increment(author_id, field, delta=1):
+    """Атомарно изменить счётчик автора на delta"""
+    updated = AuthorStats.objects.filter(author_id=author_id).update(
+        **{field: F(field) + delta}
+    )
+    if updated or delta < 0:
+        # Уменьшение без строки бывает только при каскадном удалении
+        # пользователя: создавать для него счётчики не нужно
+        return
+    try:
+        with transaction.atomic():
+            AuthorStats.objects.create(author_id=author_id, **{field: delta})
+    except IntegrityError:
+        AuthorStats.objects.filter(author_id=author_id).update(
+            **{field: F(field) + delta}
+        )
+
+
+def _counts(queryset, key):
+    return dict(
+        queryset.values(key).annotate(total=Count('id')).values_list(
+            key, 'total'
+        )
+    )
+
+
+def recount(batch_size=1000):
+    """Пересчитать счётчики всех авторов, вернуть число исправленных строк"""
+    totals = {
+        'posts_count': _counts(Post.objects.order_by(), 'author_id'),
+        'followers_count': _counts(Follow.objects.order_by(), 'author_id'),
+        'following_count': _counts(Follow.objects.order_by(), 'user_id'),
+        'comments_count': _counts(Comment.objects.order_by(), 'author_id'),
+    }
+    existing = {
+        stats.author_id: stats for stats in AuthorStats.objects.all()
+    }
+    to_create, to_update = [], []
+    for user_id in User.objects.values_list('id', flat=True).iterator():
+        values = {
+            field: totals[field].get(user_id, 0) for field in FIELDS
+        }
+        stats = existing.get(user_id)
+        if stats is None:
+            if any(values.values()):
+                to_create.append(AuthorStats(author_id=user_id, **values))
+            continue
+        if any(getattr(stats, field) != value
+               for field, value in values.items()):
+            for field, value in values.items():
+                setattr(stats, field, value)
+            to_update.append(stats)
+    AuthorStats.objects.bulk_create(
+        to_create, batch_size=batch_size, ignore_conflicts=True
+    )
+    AuthorStats.objects.bulk_update(to_update, FIELDS, batch_size=batch_size)
+    return len(to_create) + len(to_update)
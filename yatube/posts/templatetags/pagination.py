@@ -0,0 +1,29 @@
+from django import template
+
+register = template.Library()
+
+
+def _url(request, cursor):
+    params = request.GET.copy()
+    params.pop('cursor', None)
+    if cursor:
+        params['cursor'] = cursor
+    return f'?{params.urlencode()}'
+
+
+@register.inclusion_tag('posts/includes/paginator.html', takes_context=True)
+def cursor_pagination(context, page_obj):
+    """
+    Навигация по страницам курсора: первая, соседние и последняя.
+    Число ссылок не зависит от числа страниц, остальные параметры
+    запроса (например, q поиска) сохраняются.
+    """
+    request = context['request']
+    links = []
+    if page_obj.previous_cursor:
+        links.append(('Первая', _url(request, None)))
+        links.append(('Предыдущая', _url(request, page_obj.previous_cursor)))
+    if page_obj.next_cursor:
+        links.append(('Следующая', _url(request, page_obj.next_cursor)))
+        links.append(('Последняя', _url(request, page_obj.last_cursor)))
+    return {'links': links}
@@ -0,0 +1,69 @@
+from django import template
+from django.conf import settings
+from posts import thumbnails
+
+register = template.Library()
+
+MIME_TYPES = {
+    'AVIF': 'image/avif',
+    'WEBP': 'image/webp',
+    'JPEG': 'image/jpeg',
+    'PNG': 'image/png',
+}
+
+
+def _srcset(storage, variants):
+    return ', '.join(
+        f'{storage.url(variant["name"])} {variant["width"]}w'
+        for variant in variants
+    )
+
+
+@register.inclusion_tag('posts/includes/post_image.html')
+def post_image(post):
+    """
+    Картинка поста с srcset по готовым вариантам. Если вариантов ещё нет,
+    картинка ставится в очередь, а шаблон выводит заглушку. Картинку,
+    которую не удалось нарезать, шаблон заменяет заглушкой без очереди.
+    """
+    ratio_width, ratio_height = settings.IMAGE_VARIANT_RATIO
+    context = {
+        'has_image': bool(post.image),
+        'ratio': f'{ratio_width} / {ratio_height}',
+        'sizes': settings.IMAGE_SIZES,
+    }
+    if not post.image:
+        return context
+    if not post.image_variants:
+        thumbnails.schedule(post.image)
+        return context
+    variants = post.get_image_variants()
+    if not variants:
+        return context
+    by_format = {}
+    for variant in variants:
+        by_format.setdefault(variant['format'], []).append(variant)
+    formats = [
+        image_format for image_format in settings.IMAGE_VARIANT_FORMATS
+        if image_format in by_format
+    ]
+    storage = post.image.storage
+    # Последний формат понимают все браузеры, он идёт в сам <img>
+    fallback = by_format[formats[-1]]
+    image = min(
+        fallback, key=lambda variant: abs(variant['width'] - ratio_width)
+    )
+    context['sources'] = [
+        {
+            'type': MIME_TYPES[image_format],
+            'srcset': _srcset(storage, by_format[image_format]),
+        }
+        for image_format in formats[:-1]
+    ]
+    context['image'] = {
+        'url': storage.url(image['name']),
+        'width': image['width'],
+        'height': image['height'],
+        'srcset': _srcset(storage, fallback),
+    }
+    return context
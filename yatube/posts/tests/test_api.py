@@ -0,0 +1,144 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', first_name='Имя', last_name='Фамилия'
+        )
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, text=f'Пост {i}', group=cls.group
+            )
+            for i in range(13)
+        ]
+        cls.post = cls.posts[-1]
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds_paginate_by_cursor(self):
+        """Ленты API листаются курсором, как HTML-страницы"""
+        urls = [
+            reverse('api:post_list'),
+            reverse('api:group_posts', args=[self.group.slug]),
+            reverse('api:profile_posts', args=[self.author.username]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                data = self.client.get(url).json()
+                self.assertEqual(len(data['results']), 10)
+                self.assertEqual(data['results'][0]['id'], self.post.pk)
+                rest = self.client.get(
+                    url, {'cursor': data['next_cursor']}
+                ).json()
+                self.assertEqual(len(rest['results']), 3)
+                self.assertIsNone(rest['next_cursor'])
+
+    def test_sparse_fields_and_compact_output(self):
+        """fields оставляет только нужные поля, JSON без пробелов"""
+        response = self.client.get(
+            reverse('api:post_detail', args=[self.post.pk]),
+            {'fields': 'id,text,comments_count'},
+        )
+        self.assertEqual(response.content.decode(), (
+            f'{{"id":{self.post.pk},"text":"Пост 12","comments_count":1}}'
+        ))
+        response = self.client.get(
+            reverse('api:post_list'), {'fields': 'id,password'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertIn('password', response.json()['detail'])
+
+    def test_feeds_without_comments_count(self):
+        """В лентах нет числа комментариев: их кэш его не сбрасывает"""
+        response = self.client.get(
+            reverse('api:post_list'), {'fields': 'id,comments_count'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        url = reverse('api:post_detail', args=[self.post.pk])
+        params = {'fields': 'comments_count'}
+        etag = self.client.get(url, params)['ETag']
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Ещё комментарий'
+        )
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.json(), {'comments_count': 2})
+
+    def test_etag_not_modified(self):
+        """Повторный запрос с ETag получает 304 до изменения ленты"""
+        url = reverse('api:post_list')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        Post.objects.create(author=self.author, text='Новый пост')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_anonymous_feed_skips_templates(self):
+        """Лента для гостя — один запрос к базе и без шаблонов"""
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('api:post_list'))
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.templates, [])
+
+    def test_profile_comments_and_groups(self):
+        """Профиль, комментарии и группы отдаются в JSON"""
+        profile = self.reader_client.get(
+            reverse('api:profile', args=[self.author.username])
+        ).json()
+        self.assertEqual(profile['name'], 'Имя Фамилия')
+        self.assertEqual(profile['posts_count'], 13)
+        self.assertEqual(profile['followers_count'], 1)
+        self.assertTrue(profile['following'])
+        comments = self.client.get(
+            reverse('api:post_comments', args=[self.post.pk])
+        ).json()
+        self.assertEqual(comments['results'][0]['author'], 'reader')
+        groups = self.client.get(reverse('api:group_list')).json()
+        self.assertEqual(groups['results'][0]['slug'], self.group.slug)
+
+    def test_follow_feed_requires_login(self):
+        """Лента подписок доступна только авторизованному"""
+        url = reverse('api:follow_index')
+        self.assertEqual(
+            self.client.get(url).status_code, HTTPStatus.UNAUTHORIZED
+        )
+        data = self.reader_client.get(url).json()
+        self.assertEqual(len(data['results']), 10)
+
+    def test_errors_in_json(self):
+        """Ошибки отдаются в JSON, изменяющие методы запрещены"""
+        response = self.client.get(reverse('api:post_detail', args=[0]))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertEqual(response.json(), {'detail': 'Не найдено'})
+        response = self.client.get(
+            reverse('api:profile_posts', args=['nobody'])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        response = self.reader_client.post(reverse('api:post_list'))
+        self.assertEqual(
+            response.status_code, HTTPStatus.METHOD_NOT_ALLOWED
+        )
@@ -0,0 +1,67 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from posts.models import AuthorStats, Comment, Follow, Post
+from posts.search import search_posts
+from posts.urls import urlpatterns
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class LoadDataBenchmarkTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command(
+            'generate_load_data',
+            users=15, groups=3, posts=120, comments=60, follows=4,
+            images=2, seed=7, batch_size=50, stdout=StringIO(),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_generated_dataset(self):
+        """Команда generate_load_data создаёт связанный набор данных"""
+        self.assertEqual(Post.objects.count(), 120)
+        self.assertEqual(Comment.objects.count(), 60)
+        self.assertTrue(Follow.objects.exists())
+        self.assertTrue(Post.objects.exclude(image='').exists())
+        self.assertGreater(
+            Post.objects.values('pub_date').distinct().count(), 100
+        )
+        self.assertEqual(
+            sum(AuthorStats.objects.values_list('posts_count', flat=True)),
+            120,
+        )
+        post = Post.objects.first()
+        word = post.text.split()[0].strip('.,!?;:')
+        self.assertIn(post, search_posts(Post.objects.all(), word))
+
+    def test_benchmark_report(self):
+        """Команда benchmark_views пишет отчёт по каждому адресу posts"""
+        output = os.path.join(TEMP_MEDIA_ROOT, 'report.json')
+        call_command(
+            'benchmark_views', iterations=3, warmup=0, output=output,
+            stdout=StringIO(),
+        )
+        with open(output, encoding='utf-8') as report_file:
+            report = json.load(report_file)
+        self.assertEqual(report['dataset']['posts'], 120)
+        self.assertEqual(
+            set(report['views']),
+            {f'posts:{pattern.name}' for pattern in urlpatterns},
+        )
+        for name, result in report['views'].items():
+            with self.subTest(view=name):
+                self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+                self.assertLess(result['status'], 400)
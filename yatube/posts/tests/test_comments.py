@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+class PostCommentsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+        cls.limit = settings.COMMENTS_PAGE_LIMIT
+        cls.total = cls.limit + 5
+        for i in range(cls.total):
+            author = User.objects.create_user(username=f'Commenter{i}')
+            Comment.objects.create(
+                post=cls.post, author=author, text=f'Комментарий {i}'
+            )
+        cls.detail_url = reverse('posts:post_detail', args=[cls.post.id])
+        cls.comments_url = reverse('posts:post_comments', args=[cls.post.id])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_post_detail_shows_first_comments(self):
+        """Страница поста показывает только первую порцию комментариев"""
+        response = self.client.get(self.detail_url)
+        comments = response.context['comments']
+        self.assertEqual(len(comments), self.limit)
+        self.assertEqual(comments[0].text, f'Комментарий {self.total - 1}')
+        self.assertEqual(response.context['comments_count'], self.total)
+        self.assertContains(response, comments.next_cursor)
+
+    @override_settings(PAGE_CACHE_TIMEOUT=0)
+    def test_post_detail_query_budget(self):
+        """Число запросов страницы поста не зависит от числа комментариев"""
+        self.client.get(self.detail_url)
+        with self.assertNumQueries(2):
+            self.client.get(self.detail_url)
+
+    def test_fragment_returns_next_chunk(self):
+        """Фрагмент комментариев отдаёт следующую порцию HTML"""
+        first = self.client.get(self.detail_url).context['comments']
+        response = self.client.get(
+            self.comments_url, {'cursor': first.next_cursor}
+        )
+        self.assertTemplateUsed(response, 'posts/includes/comments.html')
+        self.assertEqual(len(response.context['comments']), 5)
+        self.assertContains(response, 'Комментарий 0')
+        self.assertNotContains(response, 'Показать ещё')
+
+    def test_fragment_json(self):
+        """Фрагмент комментариев отдаётся в JSON"""
+        response = self.client.get(self.comments_url, {'format': 'json'})
+        data = response.json()
+        self.assertEqual(len(data['comments']), self.limit)
+        self.assertEqual(
+            data['comments'][0]['author'], f'Commenter{self.total - 1}'
+        )
+        self.assertIsNotNone(data['next_cursor'])
+
+    def test_comments_count_reset_on_new_comment(self):
+        """Кэшированное число комментариев сбрасывается сигналом"""
+        self.client.get(self.detail_url)
+        Comment.objects.create(post=self.post, author=self.user, text='Ещё')
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.context['comments_count'], self.total + 1)
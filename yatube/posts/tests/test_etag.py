@@ -0,0 +1,103 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='Тестовый пост', group=cls.group
+        )
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+
+    def setUp(self):
+        cache.clear()
+
+    def assert_not_modified(self, client, url):
+        etag = client.get(url)['ETag']
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(response.templates)
+        return etag
+
+    def test_pages_not_modified(self):
+        """Повторный запрос с тем же ETag получает 304 без шаблонов"""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[self.post.id]),
+        )
+        for url in urls:
+            for client in (self.client, self.reader_client):
+                with self.subTest(url=url):
+                    self.assert_not_modified(client, url)
+
+    def test_etag_changes_with_content(self):
+        """ETag меняется вместе с содержимым страницы"""
+        changes = {
+            reverse('posts:index'): lambda: Post.objects.create(
+                author=self.reader, text='Новый пост'
+            ),
+            reverse('posts:group_list', args=[self.group.slug]): (
+                lambda: Group.objects.filter(pk=self.group.pk).get().save()
+            ),
+            reverse('posts:post_detail', args=[self.post.id]): (
+                lambda: Comment.objects.create(
+                    post=self.post, author=self.reader, text='Комментарий'
+                )
+            ),
+            reverse('posts:profile', args=[self.author.username]): (
+                lambda: Follow.objects.create(
+                    user=self.reader, author=self.author
+                )
+            ),
+        }
+        for url, change in changes.items():
+            with self.subTest(url=url):
+                etag = self.assert_not_modified(self.reader_client, url)
+                change()
+                response = self.reader_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_etag_differs_by_user(self):
+        """Гость и пользователь получают разные ETag"""
+        url = reverse('posts:index')
+        self.assertNotEqual(
+            self.client.get(url)['ETag'], self.reader_client.get(url)['ETag']
+        )
+
+    def test_etag_changes_with_follows(self):
+        """Ленты с кнопками подписки меняют ETag после подписки"""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                etag = self.assert_not_modified(self.reader_client, url)
+                self.reader_client.get(
+                    reverse('posts:profile_follow', args=['Author'])
+                )
+                response = self.reader_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Отписаться')
+                Follow.objects.all().delete()
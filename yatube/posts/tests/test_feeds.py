@@ -0,0 +1,81 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(FEED_ITEMS_LIMIT=5)
+class FeedsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', first_name='Имя', last_name='Фамилия'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for i in range(7):
+            Post.objects.create(
+                author=cls.author, text=f'Тестовый пост {i}', group=cls.group
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds_list_latest_posts(self):
+        """RSS и Atom отдают последние FEED_ITEMS_LIMIT постов"""
+        feeds = {
+            reverse('posts:index_rss'): ('<item>', 'application/rss+xml'),
+            reverse('posts:index_atom'): ('<entry>', 'application/atom+xml'),
+            reverse('posts:group_rss', args=[self.group.slug]): (
+                '<item>', 'application/rss+xml'
+            ),
+            reverse('posts:group_atom', args=[self.group.slug]): (
+                '<entry>', 'application/atom+xml'
+            ),
+            reverse('posts:profile_rss', args=[self.author.username]): (
+                '<item>', 'application/rss+xml'
+            ),
+            reverse('posts:profile_atom', args=[self.author.username]): (
+                '<entry>', 'application/atom+xml'
+            ),
+        }
+        for url, (tag, content_type) in feeds.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertTrue(response['Content-Type'].startswith(
+                    content_type
+                ))
+                content = response.content.decode()
+                self.assertEqual(content.count(tag), 5)
+                self.assertIn('Тестовый пост 6', content)
+                self.assertNotIn('Тестовый пост 1<', content)
+
+    def test_unknown_group_not_found(self):
+        response = self.client.get(reverse('posts:group_rss', args=['none']))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_polling_hits_cache_until_new_post(self):
+        """Повторный опрос — попадание в кэш или 304 без запросов"""
+        url = reverse('posts:group_atom', args=[self.group.slug])
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        Post.objects.create(
+            author=self.author, text='Свежий пост', group=self.group
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, 'Свежий пост')
@@ -1,9 +1,12 @@
+import os
 import shutil
 import tempfile
+from unittest import mock
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.utils import OperationalError
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from posts.models import Group, Post
@@ -12,7 +15,7 @@ User = get_user_model()
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
 class PostFormsTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -98,6 +101,36 @@ class PostFormsTests(TestCase):
         self.assertEqual(create_post.group, self.group)
         self.assertEqual(create_post.image, self.name_image_create)
 
+    @override_settings(SQLITE_WRITE_BACKOFF=0)
+    def test_locked_create_saves_image_once(self):
+        """Повтор записи при database is locked не сохраняет файл снова"""
+        save = Post.save
+        attempts = []
+
+        def locked_once(post, *args, **kwargs):
+            save(post, *args, **kwargs)
+            if not attempts:
+                attempts.append(post)
+                raise OperationalError('database is locked')
+
+        with mock.patch.object(Post, 'save', locked_once):
+            self.authorized_client.post(
+                self.reverse_templates['create'],
+                data={
+                    'text': 'Пост с картинкой',
+                    'image': SimpleUploadedFile(
+                        'locked.gif', self.small_gif, content_type='image/gif'
+                    ),
+                },
+            )
+        post = Post.objects.get(text='Пост с картинкой')
+        self.assertEqual(post.image, 'posts/locked.gif')
+        files = os.listdir(os.path.join(TEMP_MEDIA_ROOT, 'posts'))
+        self.assertEqual(
+            [name for name in files if name.startswith('locked')],
+            ['locked.gif'],
+        )
+
     def test_edit_post(self):
         """Валидная форма изменяет запись в Post"""
         response = self.authorized_client.post(
@@ -0,0 +1,79 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from posts import benchmarks, timeline
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN из SQLite')
+class FeedIndexTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.reader = User.objects.create_user(username='Reader')
+        authors = [
+            User.objects.create_user(username=f'Author{i}') for i in range(3)
+        ]
+        for author in authors:
+            Follow.objects.create(user=cls.reader, author=author)
+        Post.objects.bulk_create(
+            Post(author=authors[i % 3], group=cls.group, text=f'Пост {i}')
+            for i in range(60)
+        )
+        post = Post.objects.first()
+        Comment.objects.bulk_create(
+            Comment(post=post, author=cls.reader, text=f'Комментарий {i}')
+            for i in range(20)
+        )
+        call_command('recount_author_stats', stdout=StringIO())
+        cls.sample = benchmarks.get_sample()
+
+    def test_views_use_indexes(self):
+        """Запросы страниц используют составные индексы без сортировки"""
+        expected = {
+            'posts:index': 'post_pub_date_idx',
+            'posts:group_list': 'post_group_pub_date_idx',
+            'posts:profile': 'post_author_pub_date_idx',
+            'posts:post_detail': 'comment_post_created_idx',
+        }
+        queries = benchmarks.view_queries(self.sample, depth=30)
+        for name, page, queryset in queries:
+            if name not in expected:
+                continue
+            with self.subTest(view=name, page=page):
+                plan = queryset.explain()
+                self.assertIn(expected[name], plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+    @override_settings(TIMELINE_FANOUT=True)
+    def test_timeline_uses_index(self):
+        """Лента подписок читается диапазоном индекса записей ленты"""
+        timeline.rebuild(self.reader.pk)
+        queries = benchmarks.view_queries(self.sample, depth=30)
+        for name, page, queryset in queries:
+            if name != 'posts:follow_index':
+                continue
+            with self.subTest(page=page):
+                plan = queryset.explain()
+                self.assertIn('timeline_user_pub_date_idx', plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_explain_feeds_command(self):
+        """Команда explain_feeds выводит план для каждой страницы"""
+        out = StringIO()
+        call_command('explain_feeds', repeat=1, depth=30, stdout=out)
+        for name in ('posts:index', 'posts:group_list', 'posts:profile',
+                     'posts:follow_index', 'posts:post_detail'):
+            with self.subTest(view=name):
+                self.assertIn(name, out.getvalue())
@@ -0,0 +1,81 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='Тестовый пост', group=cls.group
+        )
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[cls.group.slug]),
+            reverse('posts:profile', args=[cls.author.username]),
+            reverse('posts:post_detail', args=[cls.post.id]),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_hit_skips_database(self):
+        """Повторный запрос гостя не обращается к базе и шаблонам"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                first = self.client.get(url)
+                self.assertEqual(first['X-Page-Cache'], 'miss')
+                with self.assertNumQueries(0):
+                    response = self.client.get(url)
+                self.assertEqual(response['X-Page-Cache'], 'hit')
+                self.assertFalse(response.templates)
+                self.assertEqual(response.content, first.content)
+
+    def test_hit_answers_conditional_get(self):
+        """Кэшированная страница отвечает 304 на совпавший ETag"""
+        url = self.urls[0]
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_signals_invalidate_pages(self):
+        """Сигналы постов, комментариев и групп сбрасывают страницы"""
+        for url in self.urls:
+            self.client.get(url)
+        Post.objects.create(
+            author=self.author, text='Новый пост', group=self.group
+        )
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Новый комментарий'
+        )
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.group.title = 'Новое название'
+        self.group.save()
+        response = self.client.get(self.urls[1])
+        self.assertContains(response, 'Новое название')
+
+    def test_session_cookie_bypasses_cache(self):
+        """Запросы с cookie сессии всегда отрисовываются заново"""
+        client = Client()
+        client.force_login(self.author)
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.client.get(url)
+                response = client.get(url)
+                self.assertNotIn('X-Page-Cache', response)
+                self.assertIsNotNone(response.context)
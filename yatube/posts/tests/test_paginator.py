@@ -0,0 +1,102 @@
+import base64
+import json
+
+from django.contrib.auth import get_user_model
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase
+from posts.models import Post
+from posts.paginator import CursorPaginator
+
+User = get_user_model()
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Тестовый пост {i}')
+            for i in range(1, 26)
+        )
+        # Одинаковая дата публикации: порядок задаёт id
+        Post.objects.update(pub_date=Post.objects.first().pub_date)
+        cls.expected = list(Post.objects.order_by('-pub_date', '-id'))
+        cls.paginator = CursorPaginator(Post.objects.all(), 10)
+
+    def test_pages_follow_each_other(self):
+        """Переход по next_cursor проходит всю ленту без повторов"""
+        page_obj = self.paginator.get_page(None)
+        seen = list(page_obj)
+        while page_obj.next_cursor:
+            page_obj = self.paginator.get_page(page_obj.next_cursor)
+            seen.extend(page_obj)
+        self.assertEqual(seen, self.expected)
+
+    def test_previous_cursor_returns_previous_page(self):
+        """previous_cursor возвращает предыдущую страницу"""
+        first_page = self.paginator.get_page(None)
+        second_page = self.paginator.get_page(first_page.next_cursor)
+        page_obj = self.paginator.get_page(second_page.previous_cursor)
+        self.assertEqual(list(page_obj), list(first_page))
+        self.assertIsNone(page_obj.previous_cursor)
+        self.assertIsNotNone(page_obj.next_cursor)
+
+    def test_page_navigation_without_count(self):
+        """has_next() и has_previous() смотрят на курсоры, без COUNT"""
+        with self.assertNumQueries(1):
+            first_page = self.paginator.get_page(None)
+        with self.assertNumQueries(0):
+            self.assertTrue(first_page.has_next())
+            self.assertFalse(first_page.has_previous())
+            self.assertTrue(first_page.has_other_pages())
+        last_page = self.paginator.get_page(first_page.last_cursor)
+        self.assertFalse(last_page.has_next())
+        self.assertTrue(last_page.has_previous())
+
+    def test_last_cursor_returns_last_page(self):
+        """last_cursor возвращает последнюю страницу ленты"""
+        first_page = self.paginator.get_page(None)
+        page_obj = self.paginator.get_page(first_page.last_cursor)
+        self.assertEqual(list(page_obj), self.expected[-10:])
+        self.assertIsNone(page_obj.next_cursor)
+        self.assertIsNotNone(page_obj.previous_cursor)
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Неверный курсор отдаёт первую страницу"""
+        for cursor in ('', 'garbage', 'WzAsIFsxXV0'):
+            with self.subTest(cursor=cursor):
+                page_obj = self.paginator.get_page(cursor)
+                self.assertEqual(list(page_obj), self.expected[:10])
+
+    def test_out_of_range_cursor_returns_first_page(self):
+        """Курсор с id больше BIGINT отдаёт первую страницу, а не ошибку"""
+        cursor = base64.urlsafe_b64encode(
+            json.dumps([0, ['2020-01-01T00:00:00', 10 ** 30]]).encode()
+        ).decode()
+        page_obj = self.paginator.get_page(cursor)
+        self.assertEqual(list(page_obj), self.expected[:10])
+
+    def test_page_does_not_count_rows(self):
+        """Страница строится одним запросом без COUNT(*)"""
+        first_page = self.paginator.get_page(None)
+        with self.assertNumQueries(1):
+            list(self.paginator.get_page(first_page.next_cursor))
+
+    def render_navigation(self, page_obj, params):
+        request = RequestFactory().get('/', params)
+        return Template(
+            '{% load pagination %}{% cursor_pagination page_obj %}'
+        ).render(Context({'request': request, 'page_obj': page_obj}))
+
+    def test_navigation_size_does_not_depend_on_pages(self):
+        """Навигация выводит не больше четырёх ссылок на любой странице"""
+        tiny = CursorPaginator(Post.objects.all(), 1)
+        page_obj = tiny.get_page(None)
+        for _ in range(3):
+            page_obj = tiny.get_page(page_obj.next_cursor)
+        html = self.render_navigation(page_obj, {'cursor': 'old', 'q': 'x'})
+        self.assertEqual(html.count('page-item'), 4)
+        self.assertIn(f'q=x&amp;cursor={page_obj.next_cursor}', html)
+        self.assertIn('href="?q=x"', html)
+        self.assertNotIn('old', html)
@@ -0,0 +1,95 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts import follow_cache
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class QueryBudgetMixin:
+    """Проверка, что страница укладывается в заданное число запросов"""
+
+    def assert_query_budget(self, client, url, budget):
+        cache.clear()
+        with self.assertNumQueries(budget):
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+
+class FeedQueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.reader)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.author = User.objects.create_user(
+            username='Author', first_name='Имя', last_name='Фамилия'
+        )
+        for i in range(1, 16):
+            author = User.objects.create_user(username=f'Author{i}')
+            Follow.objects.create(user=cls.reader, author=author)
+            Post.objects.create(
+                author=author, text=f'Тестовый пост {i}', group=cls.group
+            )
+            Post.objects.create(
+                author=cls.author, text=f'Пост автора {i}', group=cls.group
+            )
+
+    def test_anonymous_feeds_query_budget(self):
+        """Ленты для гостя не зависят от числа постов на странице"""
+        budgets = {
+            reverse('posts:index'): 1,
+            reverse('posts:group_list', args=[self.group.slug]): 2,
+            reverse('posts:profile', args=[self.author.username]): 2,
+        }
+        for url, budget in budgets.items():
+            with self.subTest(url=url):
+                response = self.assert_query_budget(self.client, url, budget)
+                self.assertEqual(len(response.context['page_obj']), 10)
+
+    def test_authorized_feeds_query_budget(self):
+        """Ленты для пользователя: плюс сессия, пользователь и подписки"""
+        budgets = {
+            reverse('posts:index'): 4,
+            reverse('posts:group_list', args=[self.group.slug]): 5,
+            reverse('posts:profile', args=[self.author.username]): 5,
+            reverse('posts:follow_index'): 4,
+        }
+        for url, budget in budgets.items():
+            with self.subTest(url=url):
+                response = self.assert_query_budget(
+                    self.authorized_client, url, budget
+                )
+                self.assertEqual(len(response.context['page_obj']), 10)
+
+    def test_followed_ids_cached(self):
+        """Подписки читаются из кэша, пока пользователь не подпишется"""
+        url = reverse('posts:follow_index')
+        cache.clear()
+        self.authorized_client.get(url)
+        with self.assertNumQueries(3):
+            self.authorized_client.get(url)
+        self.assertEqual(len(follow_cache.followed_ids(self.reader)), 15)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertIn(self.author.pk, follow_cache.followed_ids(self.reader))
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'Подписаться')
+        ids = {1, 127, 128, 300, 70000, 2 ** 40}
+        self.assertEqual(follow_cache.decode(follow_cache.encode(ids)), ids)
+
+    def test_feed_skips_unrendered_columns(self):
+        """Лента не загружает колонки, которые не выводит шаблон"""
+        post = Post.objects.for_feed().first()
+        deferred = post.get_deferred_fields()
+        self.assertNotIn('text', deferred)
+        self.assertIn('description', post.group.get_deferred_fields())
+        self.assertIn('password', post.author.get_deferred_fields())
@@ -0,0 +1,113 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from posts import search
+from posts.models import Group, Post, SearchTerm
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.group = Group.objects.create(
+            title='Кошки',
+            slug='cats',
+            description='Тестовое описание',
+        )
+        cls.once = Post.objects.create(
+            author=cls.user, text='Рыжий кот спит на окне'
+        )
+        cls.twice = Post.objects.create(
+            author=cls.user, text='Кот и ещё один кот', group=cls.group
+        )
+        cls.other = Post.objects.create(
+            author=cls.user, text='Собака гуляет во дворе'
+        )
+        cls.url = reverse('posts:search')
+
+    def found(self, query):
+        return list(
+            search.search_posts(Post.objects.all(), query).order_by(
+                *search.ORDERING
+            ).values_list('id', flat=True)
+        )
+
+    def test_search_ranks_results(self):
+        """Поиск находит все слова запроса и ставит выше частые"""
+        self.assertEqual(self.found('КОТ'), [self.twice.id, self.once.id])
+        self.assertEqual(self.found('рыжий кот'), [self.once.id])
+        self.assertEqual(self.found('!!!'), [])
+
+    def test_search_by_group_title(self):
+        """Поиск находит посты по названию группы"""
+        self.assertEqual(self.found('кошки'), [self.twice.id])
+
+    def test_index_follows_changes(self):
+        """Индекс обновляется при правке и удалении постов и групп"""
+        post = Post.objects.get(id=self.other.id)
+        post.text = 'Собака спит'
+        post.save()
+        self.assertEqual(self.found('гуляет'), [])
+        self.assertEqual(self.found('собака спит'), [post.id])
+        self.group.title = 'Коты'
+        self.group.save()
+        self.assertEqual(self.found('кошки'), [])
+        self.assertEqual(self.found('коты'), [self.twice.id])
+        self.group.delete()
+        self.assertEqual(self.found('коты'), [])
+        post.delete()
+        self.assertEqual(self.found('собака'), [])
+
+    def test_term_index_fallback(self):
+        """Без FTS5 поиск идёт по обратному индексу SearchTerm"""
+        with mock.patch('posts.search.fts_enabled', return_value=False):
+            call_command('rebuild_search_index', stdout=StringIO())
+            self.assertEqual(
+                SearchTerm.objects.get(post=self.twice, term='кот').frequency,
+                2,
+            )
+            self.assertEqual(
+                self.found('кот'), [self.twice.id, self.once.id]
+            )
+            self.assertEqual(self.found('кошки'), [self.twice.id])
+            post = Post.objects.create(author=self.user, text='Кот спит')
+            self.assertEqual(self.found('спит кот'), [post.id, self.once.id])
+
+    def test_search_page_paginates_by_cursor(self):
+        """Страница поиска листается курсором и сохраняет запрос"""
+        for i in range(12):
+            Post.objects.create(author=self.user, text=f'Кот номер {i}')
+        response = self.client.get(self.url, {'q': 'кот'})
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), 10)
+        self.assertContains(
+            response, f'q=%D0%BA%D0%BE%D1%82&amp;cursor={page_obj.next_cursor}'
+        )
+        response = self.client.get(
+            self.url, {'q': 'кот', 'cursor': page_obj.next_cursor}
+        )
+        shown = [post.id for post in page_obj]
+        rest = [post.id for post in response.context['page_obj']]
+        self.assertEqual(len(rest), 4)
+        self.assertFalse(set(shown) & set(rest))
+
+    def test_admin_uses_index(self):
+        """Поиск в админке идёт через индекс"""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'собака'}
+        )
+        self.assertEqual(
+            [post.id for post in response.context['cl'].result_list],
+            [self.other.id],
+        )
@@ -0,0 +1,125 @@
+import gzip
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(SITEMAP_CHUNK_SIZE=3)
+class SitemapTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        User.objects.create_user(username='silent')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, text=f'Пост {i}', group=cls.group
+            )
+            for i in range(7)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def chunk_urls(self):
+        content = self.client.get(reverse('posts:sitemap_index')).content
+        return [
+            line.split('<loc>')[1].split('</loc>')[0]
+            for line in content.decode().splitlines()
+            if '<loc>' in line
+        ]
+
+    def test_index_lists_chunks_by_pk_range(self):
+        """Индекс перечисляет непустые части по диапазонам pk"""
+        post_chunks = {post.pk // 3 for post in self.posts}
+        urls = self.chunk_urls()
+        self.assertEqual(len(urls), len(post_chunks) + 2)
+        self.assertIn(
+            'http://testserver' + reverse(
+                'posts:sitemap_section', args=['groups', self.group.pk // 3]
+            ),
+            urls,
+        )
+
+    def test_chunks_stream_every_url_once(self):
+        """Части вместе содержат каждый пост один раз, с lastmod"""
+        locations = []
+        for url in self.chunk_urls():
+            response = self.client.get(url)
+            self.assertTrue(response.streaming)
+            content = b''.join(response.streaming_content).decode()
+            self.assertLessEqual(content.count('<url>'), 3)
+            locations.extend(
+                line.split('<loc>')[1].split('</loc>')[0]
+                for line in content.splitlines()
+                if '<loc>' in line
+            )
+        for post in self.posts:
+            self.assertEqual(locations.count(
+                'http://testserver' + reverse(
+                    'posts:post_detail', args=[post.pk]
+                )
+            ), 1)
+        profiles = [url for url in locations if '/profile/' in url]
+        self.assertEqual(profiles, [
+            'http://testserver' + reverse(
+                'posts:profile', args=[self.author.username]
+            )
+        ])
+        self.assertIn(
+            f'<lastmod>{self.posts[-1].pub_date.date().isoformat()}',
+            content,
+        )
+
+    def test_unknown_section_not_found(self):
+        response = self.client.get(
+            reverse('posts:sitemap_section', args=['comments', 0])
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_empty_chunk_not_found(self):
+        """Часть за последней не найдена, пустой раздел отдаёт нулевую"""
+        last = self.posts[-1].pk // 3
+        response = self.client.get(
+            reverse('posts:sitemap_section', args=['posts', last + 1])
+        )
+        self.assertEqual(response.status_code, 404)
+        Post.objects.all().delete()
+        response = self.client.get(
+            reverse('posts:sitemap_section', args=['posts', 0])
+        )
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content).decode()
+        self.assertNotIn('<url>', content)
+        response = self.client.get(
+            reverse('posts:sitemap_section', args=['posts', last])
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_build_sitemaps_writes_gzip_files(self):
+        """Команда записывает индекс и части, сжатые gzip"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        call_command(
+            'build_sitemaps', directory, base_url='https://example.com/',
+            stdout=StringIO(),
+        )
+        names = os.listdir(directory)
+        self.assertEqual(len(names), len(self.chunk_urls()) + 1)
+        with gzip.open(os.path.join(directory, 'sitemap.xml.gz'), 'rt') as f:
+            self.assertIn('<loc>https://example.com/sitemap-posts-', f.read())
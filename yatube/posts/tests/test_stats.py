@@ -0,0 +1,57 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from posts.models import AuthorStats, Comment, Follow, Post
+
+User = get_user_model()
+
+
+class AuthorStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.post = Post.objects.create(author=cls.author, text='Тестовый пост')
+
+    def assert_stats(self, user, **expected):
+        stats = AuthorStats.objects.get(author=user)
+        for field, value in expected.items():
+            with self.subTest(user=user, field=field):
+                self.assertEqual(getattr(stats, field), value)
+
+    def test_counters_follow_signals(self):
+        """Счётчики меняются при создании и удалении объектов"""
+        Post.objects.create(author=self.author, text='Второй пост')
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        comment = Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+        self.assert_stats(self.author, posts_count=2, followers_count=1)
+        self.assert_stats(self.reader, following_count=1, comments_count=1)
+        follow.delete()
+        comment.delete()
+        self.post.delete()
+        self.assert_stats(self.author, posts_count=1, followers_count=0)
+        self.assert_stats(self.reader, following_count=0, comments_count=0)
+
+    def test_profile_does_not_count_posts(self):
+        """Профиль берёт число постов из счётчика, а не из COUNT(*)"""
+        AuthorStats.objects.filter(author=self.author).update(posts_count=42)
+        response = self.client.get(f'/profile/{self.author.username}/')
+        self.assertEqual(response.context['posts_count'], 42)
+
+    def test_recount_repairs_counters(self):
+        """Команда recount_author_stats исправляет расхождения"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        AuthorStats.objects.filter(author=self.author).update(
+            posts_count=42, followers_count=0
+        )
+        AuthorStats.objects.filter(author=self.reader).delete()
+        out = StringIO()
+        call_command('recount_author_stats', stdout=out)
+        self.assertIn('2', out.getvalue())
+        self.assert_stats(self.author, posts_count=1, followers_count=1)
+        self.assert_stats(self.reader, following_count=1)
@@ -0,0 +1,133 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from posts import thumbnails
+from posts.models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def run_on_commit(func):
+    func()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    @staticmethod
+    def get_image(name, size=(120, 80)):
+        buffer = BytesIO()
+        Image.new('RGB', size, (200, 0, 0)).save(buffer, 'PNG')
+        return SimpleUploadedFile(
+            name, buffer.getvalue(), content_type='image/png'
+        )
+
+    def test_placeholder_until_variants_ready(self):
+        """Пока вариантов нет, страница выводит заглушку, а не ждёт Pillow"""
+        post = Post.objects.create(
+            author=self.user, text='Пост', image=self.get_image('first.png')
+        )
+        url = reverse('posts:post_detail', args=[post.id])
+        response = self.client.get(url)
+        self.assertContains(response, 'bg-light')
+        self.assertNotContains(response, 'srcset')
+        thumbnails.generate(post.image.name)
+        response = self.client.get(url)
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, 'srcset')
+
+    def test_variants_recorded_in_db(self):
+        """Размеры и вес вариантов записываются в пост"""
+        post = Post.objects.create(
+            author=self.user,
+            text='Пост',
+            image=self.get_image('big.png', (1600, 600)),
+        )
+        thumbnails.generate(post.image.name)
+        post.refresh_from_db()
+        variants = post.get_image_variants()
+        self.assertEqual(
+            {(variant['format'], variant['width']) for variant in variants},
+            {
+                (image_format, width)
+                for image_format in settings.IMAGE_VARIANT_FORMATS
+                for width in settings.IMAGE_VARIANT_WIDTHS
+            },
+        )
+        for variant in variants:
+            with self.subTest(variant=variant['name']):
+                self.assertGreater(variant['bytes'], 0)
+                self.assertEqual(
+                    variant['height'],
+                    round(variant['width'] * 339 / 960),
+                )
+
+    def test_small_image_not_upscaled(self):
+        """Маленькая картинка не растягивается на большие ширины"""
+        post = Post.objects.create(
+            author=self.user, text='Пост', image=self.get_image('small.png')
+        )
+        thumbnails.generate(post.image.name)
+        post.refresh_from_db()
+        self.assertEqual(
+            len(post.get_image_variants()),
+            len(settings.IMAGE_VARIANT_FORMATS),
+        )
+
+    @mock.patch(
+        'posts.thumbnails.transaction.on_commit', side_effect=run_on_commit
+    )
+    def test_post_create_schedules_variants(self, on_commit):
+        """Создание поста ставит нарезку картинки в очередь"""
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Пост', 'image': self.get_image('second.png')},
+        )
+        post = Post.objects.get()
+        self.assertTrue(on_commit.called)
+        self.assertTrue(post.get_image_variants())
+
+    @mock.patch(
+        'posts.thumbnails.transaction.on_commit', side_effect=run_on_commit
+    )
+    def test_broken_image_queued_once(self, on_commit):
+        """Картинку, которую не удалось нарезать, не ставят в очередь снова"""
+        post = Post.objects.create(
+            author=self.user,
+            text='Пост',
+            image=SimpleUploadedFile(
+                'broken.png', b'not an image', content_type='image/png'
+            ),
+        )
+        url = reverse('posts:post_detail', args=[post.id])
+        with mock.patch.object(
+            thumbnails, 'make_variants', wraps=thumbnails.make_variants
+        ) as make_variants, self.assertLogs('sorl.thumbnail'):
+            for _ in range(3):
+                response = self.authorized_client.get(url)
+                self.assertContains(response, 'bg-light')
+        self.assertEqual(make_variants.call_count, 1)
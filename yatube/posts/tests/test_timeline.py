@@ -0,0 +1,100 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts import timeline
+from posts.models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+@override_settings(
+    TIMELINE_FANOUT=True, TIMELINE_MAX_LENGTH=5, TIMELINE_TRIM_SLACK=0
+)
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.follower = User.objects.create_user(username='Follower')
+        cls.authorized_follower = Client()
+        cls.authorized_follower.force_login(cls.follower)
+        for i in range(1, 4):
+            Post.objects.create(author=cls.author, text=f'Старый пост {i}')
+
+    def test_follow_backfills_and_unfollow_purges(self):
+        """Подписка заполняет ленту, отписка очищает её"""
+        self.authorized_follower.get(
+            reverse('posts:profile_follow', args=[self.author.username])
+        )
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.follower).count(), 3
+        )
+        self.authorized_follower.get(
+            reverse('posts:profile_unfollow', args=[self.author.username])
+        )
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.follower).exists()
+        )
+
+    def test_new_post_fanned_out_to_followers(self):
+        """Новый пост попадает в ленту подписчика и на страницу /follow/"""
+        Follow.objects.create(user=self.follower, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertTrue(
+            TimelineEntry.objects.filter(
+                user=self.follower, post=post
+            ).exists()
+        )
+        response = self.authorized_follower.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['page_obj'][0], post)
+
+    def test_timeline_is_bounded(self):
+        """Лента не длиннее TIMELINE_MAX_LENGTH"""
+        Follow.objects.create(user=self.follower, author=self.author)
+        for i in range(5):
+            Post.objects.create(author=self.author, text=f'Пост {i}')
+        entries = TimelineEntry.objects.filter(user=self.follower)
+        self.assertEqual(entries.count(), 5)
+        self.assertEqual(
+            list(entries.values_list('post_id', flat=True)),
+            list(Post.objects.values_list('id', flat=True)[:5]),
+        )
+
+    @override_settings(TIMELINE_TRIM_SLACK=2)
+    def test_timeline_trimmed_after_slack(self):
+        """Лента обрезается, только когда переросла предел на запас"""
+        Follow.objects.create(user=self.follower, author=self.author)
+        entries = TimelineEntry.objects.filter(user=self.follower)
+        for i in range(4):
+            Post.objects.create(author=self.author, text=f'Пост {i}')
+        self.assertEqual(entries.count(), 7)
+        Post.objects.create(author=self.author, text='Ещё пост')
+        self.assertEqual(entries.count(), 5)
+
+    def test_fan_out_queries_do_not_grow_with_followers(self):
+        """Число запросов публикации не зависит от числа подписчиков"""
+        def publish():
+            with CaptureQueriesContext(connection) as queries:
+                Post.objects.create(author=self.author, text='Пост')
+            return len(queries)
+
+        Follow.objects.create(user=self.follower, author=self.author)
+        few = publish()
+        for i in range(20):
+            Follow.objects.create(
+                user=User.objects.create_user(username=f'Reader{i}'),
+                author=self.author,
+            )
+        self.assertEqual(publish(), few)
+
+    @override_settings(TIMELINE_FANOUT_MAX_FOLLOWERS=0)
+    def test_popular_author_merged_on_read(self):
+        """Посты популярных авторов подмешиваются при чтении"""
+        Follow.objects.create(user=self.follower, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertFalse(TimelineEntry.objects.exists())
+        feed = timeline.follow_feed(self.follower)
+        self.assertEqual(feed.count(), 4)
+        self.assertIn(post, feed)
@@ -0,0 +1,126 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from posts import follow_cache, search, transfer
+from posts.models import AuthorStats, Comment, Follow, Group, Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+PUB_DATE = datetime(2020, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class TransferTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            group=cls.group,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        )
+        Post.objects.filter(pk=cls.post.pk).update(pub_date=PUB_DATE)
+        cls.comment = Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий'
+        )
+        Comment.objects.filter(pk=cls.comment.pk).update(created=PUB_DATE)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def test_export_writes_ndjson_and_images(self):
+        """Выгрузка пишет по строке на запись и копирует картинки"""
+        call_command('export_posts', self.directory, stdout=StringIO())
+        path = os.path.join(self.directory, transfer.DATA_FILE)
+        with open(path, encoding='utf-8') as data:
+            models = [json.loads(line)['model'] for line in data]
+        self.assertEqual(
+            models, ['user', 'user', 'group', 'post', 'comment', 'follow']
+        )
+        self.assertTrue(os.path.exists(os.path.join(
+            self.directory, transfer.MEDIA_DIR, self.post.image.name
+        )))
+
+    def test_import_remaps_ids(self):
+        """Загрузка сопоставляет пользователей и группы и сдвигает id"""
+        transfer.export(self.directory)
+        counts = transfer.Importer(self.directory, batch_size=1).run()
+        self.assertEqual(counts['post'], 1)
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(Group.objects.count(), 1)
+        copy = Post.objects.exclude(pk=self.post.pk).get()
+        self.assertEqual(copy.pub_date, PUB_DATE)
+        self.assertEqual(
+            (copy.author, copy.group, copy.text),
+            (self.author, self.group, self.post.text),
+        )
+        self.assertTrue(copy.image.storage.exists(copy.image.name))
+        comment = Comment.objects.exclude(pk=self.comment.pk).get()
+        self.assertEqual(comment.post, copy)
+        self.assertEqual(comment.created, PUB_DATE)
+        self.assertTrue(Comment._meta.get_field('created').auto_now_add)
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.author).posts_count, 2
+        )
+        found = search.search_posts(Post.objects.all(), 'картинкой')
+        self.assertEqual(found.count(), 2)
+
+    def test_import_invalidates_follow_cache(self):
+        """Загруженные подписки видны подписчику сразу"""
+        transfer.export(self.directory)
+        Follow.objects.all().delete()
+        self.assertEqual(follow_cache.followed_ids(self.reader), set())
+        transfer.Importer(self.directory).run()
+        self.assertEqual(
+            follow_cache.followed_ids(self.reader), {self.author.pk}
+        )
+
+    def test_import_into_empty_database(self):
+        """Загрузка в пустую базу создаёт пользователей и группы"""
+        transfer.export(self.directory)
+        Post.objects.all().delete()
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        call_command('import_posts', self.directory, stdout=StringIO())
+        post = Post.objects.get()
+        self.assertEqual(post.author.username, 'author')
+        self.assertEqual(post.group.slug, 'test-slug')
+        self.assertEqual(post.comments.get().author.username, 'reader')
+        self.assertTrue(Follow.objects.filter(
+            user__username='reader', author__username='author'
+        ).exists())
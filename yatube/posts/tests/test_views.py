@@ -14,7 +14,7 @@ User = get_user_model()
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
 class PostViewsTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -161,6 +161,9 @@ class PostViewsTests(TestCase):
         super().tearDownClass()
         shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
 
+    def setUp(self):
+        cache.clear()
+
     def test_pages_uses_correct_template(self):
         """URL-адрес использует соответствующий шаблон."""
         for reverse_name, template in self.templates_page_names.items():
@@ -273,37 +276,30 @@ class PostViewsTests(TestCase):
         for page_name in self.page_names:
             with self.subTest(page_name=page_name):
                 response = self.client.get(page_name)
-                self.assertEqual(
-                    response.context['page_obj'].start_index(), 1
-                )
-                self.assertEqual(
-                    response.context['page_obj'].end_index(), self.page_limit
-                )
+                page_obj = response.context['page_obj']
+                self.assertEqual(len(page_obj), self.page_limit)
+                self.assertIsNotNone(page_obj.next_cursor)
+                self.assertIsNone(page_obj.previous_cursor)
 
     def test_second_page_contains_ten_records(self):
         """Количество постов на втрой странице"""
         page_names = {
-            self.reverse_templates[
-                'index'
-            ] + '?page=2': self.posts_count['all'],
-            self.reverse_templates[
-                'group'
-            ] + '?page=2': self.posts_count['group'],
-            self.reverse_templates[
-                'profile'
-            ] + '?page=2': self.posts_count['author'],
+            self.reverse_templates['index']: self.posts_count['all'],
+            self.reverse_templates['group']: self.posts_count['group'],
+            self.reverse_templates['profile']: self.posts_count['author'],
         }
         for page_name, posts_count in page_names.items():
             with self.subTest(page_name=page_name):
-                response = self.client.get(page_name)
-                self.assertEqual(
-                    response.context[
-                        'page_obj'
-                    ].start_index(), self.page_limit + 1
+                first_page = self.client.get(page_name).context['page_obj']
+                response = self.client.get(
+                    page_name, {'cursor': first_page.next_cursor}
                 )
+                page_obj = response.context['page_obj']
                 self.assertEqual(
-                    response.context['page_obj'].end_index(), posts_count
+                    len(page_obj), posts_count - self.page_limit
                 )
+                self.assertIsNone(page_obj.next_cursor)
+                self.assertIsNotNone(page_obj.previous_cursor)
 
     def test_new_post_appeared_on_the_pages(self):
         """
@@ -398,7 +394,7 @@ class PostViewsTests(TestCase):
         )
 
     def test_cache(self):
-        """Главная страница кэшируется"""
+        """Главная страница кэшируется и сбрасывается при изменении постов"""
         create_post = Post.objects.create(
             author=self.user,
             text='Тестовый пост для кэширования',
@@ -407,17 +403,38 @@ class PostViewsTests(TestCase):
         response = self.authorized_client.get(
             self.reverse_templates['index']
         ).content
-        create_post.delete()
+        Post.objects.filter(pk=create_post.pk).update(text='Без сигналов')
         response_cached = self.authorized_client.get(
             self.reverse_templates['index']
         ).content
         self.assertEqual(response, response_cached)
-        cache.clear()
+        create_post.delete()
         response_non_cached = self.authorized_client.get(
             self.reverse_templates['index']
         ).content
         self.assertNotEqual(response, response_non_cached)
 
+    def test_cache_varies_by_cursor(self):
+        """Кэш главной страницы различает страницы ленты"""
+        first_page = self.client.get(self.reverse_templates['index'])
+        second_page = self.client.get(
+            self.reverse_templates['index'],
+            {'cursor': first_page.context['page_obj'].next_cursor},
+        )
+        self.assertNotEqual(first_page.content, second_page.content)
+
+    def test_group_cache_reset_when_post_moved(self):
+        """Перенос поста в другую группу сбрасывает кэш обеих групп"""
+        self.client.get(self.reverse_templates['group-other'])
+        self.client.get(self.reverse_templates['group'])
+        post = Post.objects.get(pk=self.post.pk)
+        post.group = self.test_group
+        post.save()
+        response = self.client.get(self.reverse_templates['group-other'])
+        self.assertContains(response, post.text)
+        response = self.client.get(self.reverse_templates['group'])
+        self.assertNotContains(response, post.text)
+
     def test_following_authorized_user(self):
         """
         Авторизованный пользователь может подписываться на других авторов
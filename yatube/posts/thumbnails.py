@@ -0,0 +1,164 @@
+"""
+Размеры картинок постов, подготовленные заранее.
+
+После сохранения поста его картинка уходит в пул процессов, который
+нарезает её на ширины IMAGE_VARIANT_WIDTHS в форматах
+IMAGE_VARIANT_FORMATS и записывает размеры и вес каждого варианта
+в Post.image_variants. Шаблоны строят srcset по этим данным, не трогая
+файлы, а пока вариантов нет, выводят заглушку, поэтому запрос страницы
+не ждёт Pillow.
+
+С THUMBNAIL_QUEUE картинки нарезает воркер run_worker из очереди задач
+core.tasks, а не пул процессов веб-сервера.
+"""
+import json
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+
+from . import feed_cache
+
+logger = logging.getLogger(__name__)
+
+_pending = set()
+_lock = threading.Lock()
+
+
+def _init_worker(settings_module):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+@lru_cache(maxsize=None)
+def _get_executor():
+    return ProcessPoolExecutor(
+        max_workers=settings.THUMBNAIL_WORKERS,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(os.environ['DJANGO_SETTINGS_MODULE'],),
+    )
+
+
+def _geometry(width):
+    ratio_width, ratio_height = settings.IMAGE_VARIANT_RATIO
+    return f'{width}x{round(width * ratio_height / ratio_width)}'
+
+
+def make_variants(name):
+    """Нарезать картинку на все ширины и форматы, вернуть их описание"""
+    from sorl.thumbnail import get_thumbnail
+    variants = []
+    for image_format in settings.IMAGE_VARIANT_FORMATS:
+        widths = set()
+        for width in settings.IMAGE_VARIANT_WIDTHS:
+            try:
+                thumbnail = get_thumbnail(
+                    name,
+                    _geometry(width),
+                    crop='center',
+                    upscale=False,
+                    format=image_format,
+                    quality=settings.IMAGE_VARIANT_QUALITY,
+                )
+            except Exception:
+                logger.exception('Не удалось нарезать картинку %s', name)
+                continue
+            # sorl не смог прочитать исходник и вернул пустую миниатюру
+            if not thumbnail.exists():
+                break
+            # Картинка уже исходного размера: большие ширины её не улучшат
+            if thumbnail.width in widths:
+                break
+            widths.add(thumbnail.width)
+            variants.append({
+                'name': thumbnail.name,
+                'width': thumbnail.width,
+                'height': thumbnail.height,
+                'format': image_format,
+                'bytes': thumbnail.storage.size(thumbnail.name),
+            })
+    return variants
+
+
+def generate(name):
+    """
+    Подготовить варианты картинки и записать их в посты с этой картинкой.
+    Вернуть теги лент, которые нужно сбросить.
+    """
+    # Модели импортируются здесь: процессы пула загружают этот модуль
+    # до django.setup()
+    from .models import Post
+    variants = make_variants(name)
+    posts = Post.objects.filter(image=name)
+    if not variants:
+        # Пустой список отмечает картинку, которую не удалось нарезать:
+        # шаблон выводит заглушку и больше не ставит её в очередь
+        posts.update(image_variants=json.dumps(variants))
+        return []
+    tags = [
+        tag
+        for post in posts.only('author_id', 'group_id')
+        for tag in feed_cache.post_tags(post)
+    ]
+    posts.update(image_variants=json.dumps(variants))
+    feed_cache.bump(*tags)
+    return tags
+
+
+def _done(name, future):
+    with _lock:
+        _pending.discard(name)
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is None:
+        # Кэш может быть своим у каждого процесса: сбрасываем ленты
+        # и в процессе, который показывает страницы
+        feed_cache.bump(*future.result())
+        return
+    logger.error('Не удалось нарезать картинку %s', name, exc_info=error)
+    if isinstance(error, BrokenProcessPool):
+        _get_executor.cache_clear()
+
+
+def _submit(name):
+    if settings.THUMBNAIL_QUEUE:
+        from core.tasks import enqueue
+        enqueue(
+            'posts.thumbnails.generate', [name],
+            queue='low', key=f'thumbnail:{name}',
+        )
+        return
+    if not settings.THUMBNAIL_WORKERS:
+        generate(name)
+        return
+    with _lock:
+        if name in _pending:
+            return
+        _pending.add(name)
+    try:
+        future = _get_executor().submit(generate, name)
+    except BrokenProcessPool:
+        # Упавший пул пересоздаётся при следующей картинке, а страница
+        # пока покажет заглушку
+        logger.exception('Пул нарезки картинок остановлен')
+        _get_executor.cache_clear()
+        with _lock:
+            _pending.discard(name)
+        return
+    future.add_done_callback(lambda future: _done(name, future))
+
+
+def schedule(image):
+    """Поставить картинку в очередь после фиксации транзакции"""
+    if image:
+        name = image.name
+        transaction.on_commit(lambda: _submit(name))
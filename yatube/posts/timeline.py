@@ -0,0 +1,164 @@
+"""
+Материализованная лента подписок (fan-out on write).
+
+При публикации поста его id раскладывается по лентам подписчиков автора,
+поэтому страница /follow/ листается по записям ленты: одним диапазоном
+индекса (user, -pub_date, -post) с постами через select_related, без
+соединения через Follow и без сортировки. Посты авторов, у которых
+подписчиков больше TIMELINE_FANOUT_MAX_FOLLOWERS, не раскладываются,
+а подмешиваются при чтении.
+"""
+from django.conf import settings
+from django.db.models import Count, Q
+
+from . import follow_cache
+from .models import FEED_FIELDS, AuthorStats, Follow, Post, TimelineEntry
+from .paginator import CursorPaginator
+
+
+def is_enabled():
+    return settings.TIMELINE_FANOUT
+
+
+def _is_popular(author_id):
+    followers_count = AuthorStats.objects.filter(
+        author_id=author_id
+    ).values_list('followers_count', flat=True).first()
+    return (followers_count or 0) > settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+
+
+def _trim(user_ids):
+    """
+    Обрезать до TIMELINE_MAX_LENGTH ленты, которые переросли его больше
+    чем на TIMELINE_TRIM_SLACK записей: одна агрегация на всех
+    пользователей и по DELETE на ленту раз в TIMELINE_TRIM_SLACK постов.
+    """
+    limit = settings.TIMELINE_MAX_LENGTH
+    overgrown = TimelineEntry.objects.filter(
+        user_id__in=user_ids
+    ).order_by().values('user_id').annotate(
+        total=Count('id')
+    ).filter(
+        total__gt=limit + settings.TIMELINE_TRIM_SLACK
+    ).values_list('user_id', flat=True)
+    for user_id in overgrown:
+        stale = TimelineEntry.objects.filter(user_id=user_id).order_by(
+            '-pub_date', '-post_id'
+        ).values('id')[limit:]
+        TimelineEntry.objects.filter(id__in=stale).delete()
+
+
+def fan_out(post):
+    """Разложить новый пост по лентам подписчиков автора"""
+    if _is_popular(post.author_id):
+        return
+    follower_ids = list(
+        Follow.objects.filter(author_id=post.author_id).values_list(
+            'user_id', flat=True
+        )
+    )
+    if not follower_ids:
+        return
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+            for user_id in follower_ids
+        ],
+        ignore_conflicts=True,
+    )
+    _trim(follower_ids)
+
+
+def backfill(user_id, author_id):
+    """Добавить в ленту подписчика последние посты нового автора"""
+    if _is_popular(author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-id'
+    ).values_list('id', 'pub_date')[:settings.TIMELINE_MAX_LENGTH]
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for post_id, pub_date in posts
+        ],
+        ignore_conflicts=True,
+    )
+    _trim([user_id])
+
+
+def purge(user_id, author_id):
+    """Убрать из ленты посты автора, от которого пользователь отписался"""
+    TimelineEntry.objects.filter(
+        user_id=user_id,
+        post__author_id=author_id,
+    ).delete()
+
+
+def rebuild(user_id):
+    """Пересобрать ленту пользователя с нуля"""
+    TimelineEntry.objects.filter(user_id=user_id).delete()
+    author_ids = Follow.objects.filter(user_id=user_id).values_list(
+        'author_id', flat=True
+    )
+    for author_id in author_ids:
+        backfill(user_id, author_id)
+
+
+def popular_author_ids(user):
+    """Авторы из подписок пользователя, посты которых читаются напрямую"""
+    followed = follow_cache.followed_ids(user)
+    if not followed:
+        return []
+    return list(
+        AuthorStats.objects.filter(
+            author_id__in=followed,
+            followers_count__gt=settings.TIMELINE_FANOUT_MAX_FOLLOWERS,
+        ).values_list('author_id', flat=True)
+    )
+
+
+def follow_feed(user):
+    """Queryset постов для ленты подписок пользователя"""
+    if not is_enabled():
+        return Post.objects.filter(
+            author_id__in=follow_cache.followed_ids(user)
+        )
+    popular = popular_author_ids(user)
+    if not popular:
+        return Post.objects.filter(timeline_entries__user=user)
+    return Post.objects.filter(
+        Q(id__in=TimelineEntry.objects.filter(user=user).values('post_id'))
+        | Q(author_id__in=popular)
+    )
+
+
+class TimelinePaginator(CursorPaginator):
+    """
+    Страницы ленты из записей TimelineEntry. Курсор тот же, что у постов
+    (pub_date, id), а на странице вместо записей — их посты.
+    """
+
+    def __init__(self, entries, per_page):
+        super().__init__(entries, per_page, ordering=('-pub_date', '-post_id'))
+
+    def page(self, position=None, reverse=False):
+        page = super().page(position, reverse)
+        page.object_list = [entry.post for entry in page.object_list]
+        return page
+
+
+def follow_entries(user):
+    """Записи ленты пользователя вместе с постами для post_list.html"""
+    return TimelineEntry.objects.filter(user=user).select_related(
+        'post__author', 'post__group'
+    ).only('pub_date', 'post_id', *[f'post__{name}' for name in FEED_FIELDS])
+
+
+def follow_paginator(user, per_page):
+    """
+    Пагинатор ленты подписок: по записям материализованной ленты, если
+    в ней все авторы, иначе по постам follow_feed.
+    """
+    if is_enabled() and not popular_author_ids(user):
+        return TimelinePaginator(follow_entries(user), per_page)
+    return CursorPaginator(follow_feed(user).for_feed(), per_page)
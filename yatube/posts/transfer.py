@@ -0,0 +1,247 @@
+"""
+Перенос контента между базами в формате NDJSON.
+
+Выгрузка — каталог с файлом data.ndjson и копиями картинок постов
+в media/. Каждая строка файла — одна запись {"model": ..., "id": ...,
+поля}, записи идут в порядке user, group, post, comment, follow, чтобы
+при загрузке всё, на что ссылается строка, уже было в базе.
+
+Выгрузка читает таблицы итератором с курсором на сервере, а загрузка
+сохраняет записи пачками через bulk_create, поэтому память не растёт
+с числом постов и комментариев. Пользователи и группы сопоставляются
+по username и slug, их соответствие старым id хранится в памяти.
+Посты и комментарии получают id, сдвинутые на максимальный id в базе
+на момент загрузки, и ссылки на них пересчитываются без таблиц
+соответствия.
+
+bulk_create не отправляет сигналы, поэтому после загрузки счётчики,
+поисковый индекс и ленты подписок пересчитываются целиком.
+"""
+import json
+import os
+import shutil
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Max
+from django.utils.dateparse import parse_datetime
+
+from . import feed_cache, follow_cache, search, stats, timeline
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+DATA_FILE = 'data.ndjson'
+MEDIA_DIR = 'media'
+
+EXPORTED_FIELDS = {
+    'user': (User, ('id', 'username', 'first_name', 'last_name', 'email')),
+    'group': (Group, ('id', 'title', 'slug', 'description')),
+    'post': (Post, ('id', 'author_id', 'group_id', 'text', 'pub_date',
+                    'image')),
+    'comment': (Comment, ('id', 'post_id', 'author_id', 'text', 'created')),
+    'follow': (Follow, ('user_id', 'author_id')),
+}
+
+
+def _copy_image(name, directory):
+    target = os.path.join(directory, MEDIA_DIR, name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with default_storage.open(name) as source, open(target, 'wb') as copy:
+        shutil.copyfileobj(source, copy)
+
+
+def export(directory, batch_size=1000):
+    """Выгрузить контент в каталог, вернуть число записей по моделям"""
+    os.makedirs(directory, exist_ok=True)
+    counts = {}
+    path = os.path.join(directory, DATA_FILE)
+    with open(path, 'w', encoding='utf-8') as output:
+        for name, (model, fields) in EXPORTED_FIELDS.items():
+            counts[name] = 0
+            rows = model.objects.using(DEFAULT_DB_ALIAS).order_by(
+                'pk'
+            ).values(*fields).iterator(chunk_size=batch_size)
+            for row in rows:
+                if row.get('image'):
+                    if default_storage.exists(row['image']):
+                        _copy_image(row['image'], directory)
+                    else:
+                        row['image'] = ''
+                output.write(json.dumps(
+                    {'model': name, **row},
+                    cls=DjangoJSONEncoder, ensure_ascii=False,
+                ))
+                output.write('\n')
+                counts[name] += 1
+    return counts
+
+
+def _create_with_dates(model, objects, field):
+    """
+    bulk_create, сохраняющий даты из выгрузки. auto_now_add заполняет
+    поле текущим временем при вставке, поэтому даты записываются следом
+    через bulk_update, а не отключением auto_now_add у общего поля.
+    """
+    objects = list(objects)
+    dates = [getattr(obj, field) for obj in objects]
+    model.objects.bulk_create(objects)
+    for obj, date in zip(objects, dates):
+        setattr(obj, field, date)
+    model.objects.bulk_update(objects, [field])
+
+
+def _max_id(model):
+    return model.objects.using(DEFAULT_DB_ALIAS).aggregate(
+        value=Max('pk')
+    )['value'] or 0
+
+
+class Importer:
+    """Загрузка каталога, созданного export()"""
+
+    def __init__(self, directory, batch_size=1000):
+        self.directory = directory
+        self.batch_size = batch_size
+        self.users = {}
+        self.groups = {}
+        self.followers = set()
+        self.post_offset = _max_id(Post)
+        self.comment_offset = _max_id(Comment)
+        self.counts = {name: 0 for name in EXPORTED_FIELDS}
+        self.batch = []
+        self.batch_model = None
+
+    def run(self):
+        path = os.path.join(self.directory, DATA_FILE)
+        with open(path, encoding='utf-8') as data:
+            for line in data:
+                if line.strip():
+                    self.add(json.loads(line))
+            self.flush()
+        self.finish()
+        return self.counts
+
+    def add(self, row):
+        model = row.pop('model')
+        if model != self.batch_model or len(self.batch) >= self.batch_size:
+            self.flush()
+            self.batch_model = model
+        self.batch.append(row)
+
+    def flush(self):
+        if not self.batch:
+            return
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            getattr(self, f'save_{self.batch_model}s')(self.batch)
+        self.counts[self.batch_model] += len(self.batch)
+        self.batch = []
+
+    def _match(self, model, key, rows, build):
+        """Найти объекты по key, создать недостающие, вернуть старый id → id"""
+        values = [row[key] for row in rows]
+        found = model.objects.using(DEFAULT_DB_ALIAS).filter(
+            **{f'{key}__in': values}
+        )
+        existing = dict(found.values_list(key, 'id'))
+        model.objects.bulk_create(
+            build(row) for row in rows if row[key] not in existing
+        )
+        existing.update(found.values_list(key, 'id'))
+        return {row['id']: existing[row[key]] for row in rows}
+
+    def save_users(self, rows):
+        password = make_password(None)
+        self.users.update(self._match(
+            User, 'username', rows, lambda row: User(
+                username=row['username'],
+                first_name=row['first_name'],
+                last_name=row['last_name'],
+                email=row['email'],
+                password=password,
+            )
+        ))
+
+    def save_groups(self, rows):
+        groups = self._match(Group, 'slug', rows, lambda row: Group(
+            title=row['title'],
+            slug=row['slug'],
+            description=row['description'],
+        ))
+        self.groups.update(groups)
+        feed_cache.bump(*map(feed_cache.group_tag, groups.values()))
+
+    def _import_image(self, name):
+        source = os.path.join(self.directory, MEDIA_DIR, name)
+        if not name or not os.path.exists(source):
+            return ''
+        with open(source, 'rb') as image:
+            return default_storage.save(name, File(image))
+
+    def save_posts(self, rows):
+        _create_with_dates(Post, (
+            Post(
+                id=row['id'] + self.post_offset,
+                author_id=self.users[row['author_id']],
+                group_id=self.groups.get(row['group_id']),
+                text=row['text'],
+                pub_date=parse_datetime(row['pub_date']),
+                image=self._import_image(row['image']),
+            )
+            for row in rows
+        ), 'pub_date')
+        authors = {self.users[row['author_id']] for row in rows}
+        feed_cache.bump(*map(feed_cache.author_tag, authors))
+
+    def save_comments(self, rows):
+        _create_with_dates(Comment, (
+            Comment(
+                id=row['id'] + self.comment_offset,
+                post_id=row['post_id'] + self.post_offset,
+                author_id=self.users[row['author_id']],
+                text=row['text'],
+                created=parse_datetime(row['created']),
+            )
+            for row in rows
+        ), 'created')
+
+    def save_follows(self, rows):
+        self.followers.update(self.users[row['user_id']] for row in rows)
+        Follow.objects.bulk_create(
+            (
+                Follow(
+                    user_id=self.users[row['user_id']],
+                    author_id=self.users[row['author_id']],
+                )
+                for row in rows
+            ),
+            ignore_conflicts=True,
+        )
+
+    def finish(self):
+        """Пересчитать то, что обычно обновляют сигналы"""
+        connection = connections[DEFAULT_DB_ALIAS]
+        sequences = connection.ops.sequence_reset_sql(
+            no_style(), [Post, Comment]
+        )
+        if sequences:
+            with connection.cursor() as cursor:
+                for sql in sequences:
+                    cursor.execute(sql)
+        stats.recount(batch_size=self.batch_size)
+        search.rebuild(batch_size=self.batch_size)
+        if timeline.is_enabled():
+            for user_id in set(self.users.values()):
+                timeline.rebuild(user_id)
+        for user_id in self.followers:
+            follow_cache.invalidate(user_id)
+        feed_cache.bump(
+            feed_cache.INDEX,
+            feed_cache.GROUPS,
+            *[feed_cache.follower_tag(user_id) for user_id in self.followers],
+        )
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import feeds, sitemaps, views
 
 app_name = 'posts'
 
@@ -9,7 +9,13 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path('search/', views.search, name='search'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path(
@@ -18,6 +24,30 @@ urlpatterns = [
         name='add_comment'
     ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('sitemap.xml', sitemaps.sitemap_index, name='sitemap_index'),
+    path(
+        'sitemap-<slug:section>-<int:number>.xml',
+        sitemaps.sitemap_section,
+        name='sitemap_section'
+    ),
+    path('feeds/rss/', feeds.index_rss, name='index_rss'),
+    path('feeds/atom/', feeds.index_atom, name='index_atom'),
+    path('feeds/group/<slug:slug>/rss/', feeds.group_rss, name='group_rss'),
+    path(
+        'feeds/group/<slug:slug>/atom/',
+        feeds.group_atom,
+        name='group_atom'
+    ),
+    path(
+        'feeds/profile/<str:username>/rss/',
+        feeds.profile_rss,
+        name='profile_rss'
+    ),
+    path(
+        'feeds/profile/<str:username>/atom/',
+        feeds.profile_atom,
+        name='profile_atom'
+    ),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
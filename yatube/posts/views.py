@@ -1,85 +1,245 @@
+from core.db.parallel import gather
+from core.db.routers import writes_on_get
+from core.db.sqlite import save_files, serialized, serialized_write
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import condition
 
+from . import feed_cache, follow_cache, page_cache, thumbnails, timeline
 from .forms import CommentForm, PostForm
 from .models import Follow, Group, Post, User
+from .paginator import CursorPaginator
+from .search import ORDERING, search_posts
+from .stats import comments_count, stats_for
 
 
+def _once(request, key, load):
+    """
+    Объект страницы загружается один раз за запрос: и для ETag,
+    и для самой view-функции.
+    """
+    loaded = request.__dict__.setdefault('_page_objects', {})
+    if key not in loaded:
+        loaded[key] = load()
+    return loaded[key]
+
+
+def page_group(request, slug):
+    return _once(request, 'group', lambda: get_object_or_404(
+        Group, slug=slug
+    ))
+
+
+def page_author(request, username):
+    return _once(request, 'author', lambda: get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    ))
+
+
+def page_post(request, post_id):
+    return _once(request, 'post', lambda: get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), id=post_id
+    ))
+
+
+def index_tags(request):
+    return [feed_cache.INDEX, feed_cache.GROUPS]
+
+
+def group_tags(request, slug):
+    return [feed_cache.group_tag(page_group(request, slug).pk)]
+
+
+def profile_tags(request, username):
+    author = page_author(request, username)
+    return [feed_cache.author_tag(author.pk), feed_cache.GROUPS]
+
+
+def post_detail_tags(request, post_id):
+    post = page_post(request, post_id)
+    tags = [
+        feed_cache.post_tag(post.pk),
+        feed_cache.author_tag(post.author_id),
+    ]
+    if post.group_id:
+        tags.append(feed_cache.group_tag(post.group_id))
+    return tags
+
+
+def viewer_tags(request):
+    """Кнопки подписки в ленте зависят от подписок пользователя"""
+    if request.user.is_authenticated:
+        return [feed_cache.follower_tag(request.user.pk)]
+    return []
+
+
+def index_etag(request):
+    return feed_cache.etag(
+        request, *index_tags(request), *viewer_tags(request)
+    )
+
+
+def group_etag(request, slug):
+    return feed_cache.etag(
+        request, *group_tags(request, slug), *viewer_tags(request)
+    )
+
+
+def profile_etag(request, username):
+    return feed_cache.etag(
+        request, *profile_tags(request, username), *viewer_tags(request)
+    )
+
+
+def post_detail_etag(request, post_id):
+    return feed_cache.etag(request, *post_detail_tags(request, post_id))
+
+
+@page_cache.cache_anonymous(index_tags)
+@condition(etag_func=index_etag)
 def index(request):
     """View-функция для отображения главной страницы"""
     template = 'posts/index.html'
     index = True
-    posts = Post.objects.select_related('group').order_by('-pub_date')
-    paginator = Paginator(posts, settings.POSTS_PAGE_LIMIT)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    posts = Post.objects.for_feed()
+    paginator = CursorPaginator(posts, settings.POSTS_PAGE_LIMIT)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     context = {
         'page_obj': page_obj,
         'index': index,
+        'cache_key': feed_cache.fragment_key(
+            request, feed_cache.INDEX, feed_cache.GROUPS
+        ),
+        'cache_timeout': settings.FEED_CACHE_TIMEOUT,
     }
     return render(request, template, context)
 
 
+@page_cache.cache_anonymous(group_tags)
+@condition(etag_func=group_etag)
 def group_posts(request, slug):
     """View-функция для отображение страницы группы"""
-    group = get_object_or_404(Group, slug=slug)
+    group = page_group(request, slug)
     template = 'posts/group_list.html'
-    posts = group.posts.order_by('-pub_date')
-    paginator = Paginator(posts, settings.POSTS_PAGE_LIMIT)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    posts = group.posts.for_feed()
+    paginator = CursorPaginator(posts, settings.POSTS_PAGE_LIMIT)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     context = {
         'group': group,
         'page_obj': page_obj,
+        'cache_key': feed_cache.fragment_key(
+            request, feed_cache.group_tag(group.pk)
+        ),
+        'cache_timeout': settings.FEED_CACHE_TIMEOUT,
     }
     return render(request, template, context)
 
 
+@page_cache.cache_anonymous(profile_tags)
+@condition(etag_func=profile_etag)
 def profile(request, username):
     template = 'posts/profile.html'
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.order_by('-pub_date')
-    posts_count = posts.count()
-    paginator = Paginator(posts, settings.POSTS_PAGE_LIMIT)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    following = False
-    if request.user.is_authenticated:
-        following = Follow.objects.filter(
-            user=request.user,
-            author=author,
-        ).exists()
+    author = page_author(request, username)
+    posts = author.posts.for_feed()
+    posts_count = stats_for(author).posts_count
+    paginator = CursorPaginator(posts, settings.POSTS_PAGE_LIMIT)
+    page_obj, followed_ids = gather(
+        lambda: paginator.get_page(request.GET.get('cursor')),
+        lambda: follow_cache.followed_ids(request.user),
+    )
+    following = author.pk in followed_ids
     show_button = request.user.is_authenticated and author != request.user
     context = {
         'page_obj': page_obj,
         'posts_count': posts_count,
         'author': author,
         'following': following,
-        'is_user': show_button
+        'is_user': show_button,
+        'cache_key': feed_cache.fragment_key(
+            request, feed_cache.author_tag(author.pk), feed_cache.GROUPS
+        ),
+        'cache_timeout': settings.FEED_CACHE_TIMEOUT,
+    }
+    return render(request, template, context)
+
+
+def search(request):
+    """View-функция для поиска по постам и названиям групп"""
+    template = 'posts/search.html'
+    query = request.GET.get('q', '').strip()
+    posts = search_posts(Post.objects.for_feed(), query)
+    paginator = CursorPaginator(
+        posts, settings.POSTS_PAGE_LIMIT, ordering=ORDERING
+    )
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
     }
     return render(request, template, context)
 
 
+def comments_page(request, post):
+    """Страница комментариев поста по курсору из запроса"""
+    comments = post.comments.select_related('author').only(
+        'text', 'created', 'post_id', 'author__username'
+    )
+    paginator = CursorPaginator(
+        comments, settings.COMMENTS_PAGE_LIMIT, ordering=('-created', '-id')
+    )
+    return paginator.get_page(request.GET.get('cursor'))
+
+
+@page_cache.cache_anonymous(post_detail_tags)
+@condition(etag_func=post_detail_etag)
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, id=post_id)
-    author = post.author
-    posts_count = author.posts.count()
+    post = page_post(request, post_id)
+    posts_count = stats_for(post.author).posts_count
     post_title = post.text[:settings.POST_TITLE_LIMIT]
-    comments = post.comments.order_by('-created')
+    comments, count = gather(
+        lambda: comments_page(request, post),
+        lambda: comments_count(post.pk),
+    )
     form = CommentForm(request.POST or None)
     context = {
         'post': post,
         'posts_count': posts_count,
         'post_title': post_title,
         'comments': comments,
+        'comments_count': count,
         'form': form,
     }
     return render(request, template, context)
 
 
+def post_comments(request, post_id):
+    """Следующая порция комментариев: HTML-фрагмент или JSON"""
+    post = get_object_or_404(Post.objects.only('id'), id=post_id)
+    comments = comments_page(request, post)
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'comments': [
+                {
+                    'id': comment.pk,
+                    'author': comment.author.username,
+                    'text': comment.text,
+                    'created': comment.created,
+                }
+                for comment in comments
+            ],
+            'next_cursor': comments.next_cursor,
+        })
+    template = 'posts/includes/comments.html'
+    context = {
+        'post': post,
+        'comments': comments,
+    }
+    return render(request, template, context)
+
+
 @login_required
 def post_create(request):
     template = 'posts/create_post.html'
@@ -90,7 +250,11 @@ def post_create(request):
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
-        post.save()
+        # Файл сохраняется один раз: при database is locked повторяется
+        # только запись в базу
+        save_files(post)
+        serialized(post.save)
+        thumbnails.schedule(post.image)
         return redirect('posts:profile', request.user.username)
     groups = Group.objects.all()
     context = {
@@ -114,7 +278,12 @@ def post_edit(request, post_id):
     )
     if form.is_valid():
         post = form.save(commit=False)
-        post.save()
+        if 'image' in form.changed_data:
+            post.image_variants = ''
+        save_files(post)
+        serialized(post.save)
+        if 'image' in form.changed_data:
+            thumbnails.schedule(post.image)
         return redirect('posts:post_detail', post.id)
     groups = Group.objects.all()
     context = {
@@ -127,6 +296,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@serialized_write
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
@@ -142,10 +312,10 @@ def add_comment(request, post_id):
 def follow_index(request):
     template = 'posts/follow.html'
     follow = True
-    posts = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(posts, settings.POSTS_PAGE_LIMIT)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = timeline.follow_paginator(
+        request.user, settings.POSTS_PAGE_LIMIT
+    )
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     context = {
         'page_obj': page_obj,
         'follow': follow,
@@ -154,6 +324,8 @@ def follow_index(request):
 
 
 @login_required
+@writes_on_get
+@serialized_write(all_methods=True)
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if author != request.user:
@@ -165,6 +337,8 @@ def profile_follow(request, username):
 
 
 @login_required
+@writes_on_get
+@serialized_write(all_methods=True)
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     follow = get_object_or_404(Follow, user=request.user, author=author,)
@@ -14,6 +14,74 @@ import os
 
 POSTS_PAGE_LIMIT: int = 10
 POST_TITLE_LIMIT: int = 10
+# Число записей в RSS- и Atom-лентах
+FEED_ITEMS_LIMIT: int = 20
+# Адресов в одной части карты сайта (не больше 50 000 по протоколу)
+# и строк, читаемых из базы за раз при её выводе
+SITEMAP_CHUNK_SIZE: int = 50000
+SITEMAP_BATCH_SIZE: int = 2000
+COMMENTS_PAGE_LIMIT: int = 20
+
+# Материализованная лента подписок (fan-out on write)
+TIMELINE_FANOUT: bool = False
+TIMELINE_MAX_LENGTH: int = 1000
+# Ленты обрезаются до TIMELINE_MAX_LENGTH, только когда переросли его
+# на столько записей: не на каждый пост для каждого подписчика
+TIMELINE_TRIM_SLACK: int = 100
+# Посты авторов с большим числом подписчиков не раскладываются по лентам,
+# а подмешиваются при чтении
+TIMELINE_FANOUT_MAX_FOLLOWERS: int = 5000
+
+# Хранилище кэша (CACHES ниже): locmem — своё у каждого процесса,
+# file, db или memcached — общее для всех процессов и команд.
+# CACHE_LOCATION — каталог, таблица (после createcachetable) или адрес
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+CACHE_LOCATION = os.environ.get('CACHE_LOCATION', '')
+CACHE_SHARED: bool = CACHE_BACKEND != 'locmem'
+# Сигналы сбрасывают кэш только там, где выполнена запись. Без общего
+# кэша другие процессы видят изменения лишь по истечении TTL, поэтому
+# ничего не хранится дольше LOCAL_CACHE_TIMEOUT секунд
+LOCAL_CACHE_TIMEOUT: int = 60
+# Время жизни фрагментов лент: их сбрасывают сигналы, а не TTL
+FEED_CACHE_TIMEOUT: int = (
+    60 * 60 * 6 if CACHE_SHARED else LOCAL_CACHE_TIMEOUT
+)
+# Время жизни целых страниц для гостей: их тоже сбрасывают сигналы
+PAGE_CACHE_TIMEOUT: int = 60 * 60 if CACHE_SHARED else LOCAL_CACHE_TIMEOUT
+# Время жизни множества подписок пользователя (posts.follow_cache)
+FOLLOW_CACHE_TIMEOUT: int = (
+    60 * 60 * 24 if CACHE_SHARED else LOCAL_CACHE_TIMEOUT
+)
+# Поколения feed_cache и счётчики комментариев: в общем кэше бессрочно
+COUNTER_CACHE_TIMEOUT = None if CACHE_SHARED else LOCAL_CACHE_TIMEOUT
+
+# Картинки постов нарезаются заранее в пуле процессов на несколько ширин
+# и форматов; при THUMBNAIL_WORKERS = 0 — прямо в запросе.
+# Последний формат выводится в <img> для браузеров без поддержки остальных
+IMAGE_VARIANT_WIDTHS: tuple = (480, 960, 1440)
+IMAGE_VARIANT_FORMATS: tuple = ('WEBP', 'JPEG')
+IMAGE_VARIANT_RATIO: tuple = (960, 339)
+IMAGE_VARIANT_QUALITY: int = 80
+IMAGE_SIZES: str = '(max-width: 992px) 100vw, 960px'
+THUMBNAIL_WORKERS: int = 2
+# Нарезать картинки воркером run_worker (очередь low) вместо пула
+# процессов веб-сервера
+THUMBNAIL_QUEUE: bool = os.environ.get('THUMBNAIL_QUEUE') == '1'
+
+# Очередь задач core.tasks: очереди в порядке приоритета для run_worker,
+# попытки и задержка перед повтором (удваивается с каждой попыткой).
+# Задача, взятая воркером дольше TASKS_LOCK_TIMEOUT секунд назад,
+# считается брошенной. При TASKS_EAGER задачи выполняются сразу
+TASKS_QUEUES: tuple = ('high', 'default', 'low')
+TASKS_MAX_ATTEMPTS: int = 5
+TASKS_RETRY_BACKOFF: float = 5
+TASKS_LOCK_TIMEOUT: int = 600
+TASKS_CONCURRENCY: int = 4
+TASKS_EAGER: bool = os.environ.get('TASKS_EAGER') == '1'
+
+# Заголовок Server-Timing с временем базы, шаблонов и всего запроса;
+# гистограммы по view-функциям копятся всегда и отдаются на /metrics/
+METRICS_SERVER_TIMING: bool = True
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -26,7 +94,10 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Письма из запросов ставятся в очередь задач, а отправляет их воркер
+# через TASKS_EMAIL_BACKEND
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
+TASKS_EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 # Quick-start development settings - unsuitable for production
@@ -66,11 +137,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.db.routers.PrimaryPinMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     # 'debug_toolbar.middleware.DebugToolbarMiddleware',
@@ -90,6 +163,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.follows.follows',
             ],
         },
     },
@@ -101,13 +175,67 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# Соединения с базой: DB_CONN_MAX_AGE — сколько секунд держать соединение
+# потока (0 — закрывать после каждого запроса). DB_POOL_SIZE > 0 включает
+# пул core.db.backends.sqlite3: закрытые соединения возвращаются в пул
+# воркера, а не закрываются, и переиспользуются другими потоками
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 0))
+# Потоки для независимых запросов одной страницы (core.db.parallel);
+# 0 — выполнять их по очереди в потоке запроса
+PARALLEL_QUERY_WORKERS = int(os.environ.get('PARALLEL_QUERY_WORKERS', 4))
+
+# Прагмы для каждого нового соединения SQLite (core.db.sqlite)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+# Повторы изменяющих запросов при database is locked: число и начальная
+# задержка в секундах, которая удваивается с каждой попыткой
+SQLITE_WRITE_RETRIES: int = 3
+SQLITE_WRITE_BACKOFF: float = 0.05
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': (
+            'core.db.backends.sqlite3' if DB_POOL_SIZE
+            else 'django.db.backends.sqlite3'
+        ),
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'POOL': {
+            'MAX_SIZE': DB_POOL_SIZE,
+            'TIMEOUT': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            'HEALTH_CHECK_INTERVAL': int(
+                os.environ.get('DB_POOL_HEALTH_CHECK_INTERVAL', 30)
+            ),
+        },
     }
 }
 
+# Реплики для чтения ленты (core.db.routers): DB_REPLICAS — пути к файлам
+# через запятую. Локально их заполняет команда sync_replicas.
+# REPLICA_STRATEGY: round_robin или least_loaded. REPLICA_PIN_SECONDS —
+# сколько секунд после записи клиент читает из основной базы
+DATABASE_REPLICAS = []
+for number, path in enumerate(
+    filter(None, os.environ.get('DB_REPLICAS', '').split(',')), start=1
+):
+    alias = f'replica_{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': path.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+REPLICA_STRATEGY = os.environ.get('REPLICA_STRATEGY', 'round_robin')
+REPLICA_PIN_SECONDS: int = 10
+DATABASE_ROUTERS = ['core.db.routers.ReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -150,9 +278,23 @@ STATIC_URL = '/static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', ''),
+    'file': (
+        'django.core.cache.backends.filebased.FileBasedCache',
+        os.path.join(BASE_DIR, 'cache'),
+    ),
+    'db': ('django.core.cache.backends.db.DatabaseCache', 'cache_table'),
+    # Нужен пакет python-memcached
+    'memcached': (
+        'django.core.cache.backends.memcached.MemcachedCache',
+        '127.0.0.1:11211',
+    ),
+}
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': CACHE_LOCATION or CACHE_BACKENDS[CACHE_BACKEND][1],
     }
 }
 